@@ -4,25 +4,23 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle, Flowable
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.lib import colors
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+import io
+import os
+import re
+import sys
 
-def create_recovery_toolkit_pdf():
-    """Generate the Recovery Toolkit PDF with proper UTF-8 encoding"""
-    
-    # Create PDF
-    pdf_file = "client/public/recovery-toolkit.pdf"
-    doc = SimpleDocTemplate(pdf_file, pagesize=letter,
-                           rightMargin=0.75*inch, leftMargin=0.75*inch,
-                           topMargin=0.75*inch, bottomMargin=0.75*inch)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Define styles
+BLANK_RE = re.compile(r'_{3,}')
+
+# pdf_manifest.py (hash / ETag sidecars) and pdf_linearize.py live with the HTML templates
+PDF_TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdf-templates')
+
+def get_styles():
+    """Paragraph styles used throughout the Recovery Toolkit"""
     styles = getSampleStyleSheet()
     
     title_style = ParagraphStyle(
@@ -75,12 +73,131 @@ def create_recovery_toolkit_pdf():
         fontName='Helvetica'
     )
     
+    return {
+        'title': title_style,
+        'subtitle': subtitle_style,
+        'heading2': heading2_style,
+        'heading3': heading3_style,
+        'body': body_style,
+    }
+
+
+class FieldAnchor(Flowable):
+    """Zero-size marker that records where it lands, for stamping text there later"""
+
+    def __init__(self, name, layout, font='Helvetica-Oblique', size=12):
+        Flowable.__init__(self)
+        self.name = name
+        self.layout = layout
+        self.font = font
+        self.size = size
+        self.width = self.height = 0
+
+    def draw(self):
+        pass
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        if self.layout is not None:
+            page_width = canvas._pagesize[0]
+            self.layout[self.name] = {'page': canvas.getPageNumber(), 'x': page_width / 2,
+                                      'y': y - 2 * self.size, 'width': page_width - 2 * x,
+                                      'font': self.font, 'size': self.size, 'align': 'center'}
+
+
+class FieldTable(Table):
+    """
+    Table that records where the blank ("______") in each field row is drawn
+
+    Args:
+        fields: {row index: field name}
+        layout: dict filled with {field name: position} when the table is
+            drawn (None = don't record)
+    """
+
+    def __init__(self, data, fields, layout, **kwargs):
+        Table.__init__(self, data, **kwargs)
+        self.fields = fields
+        self.layout = layout
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        Table.drawOn(self, canvas, x, y, _sW)
+        if self.layout is None:
+            return
+        x = self._hAlignAdjust(x, _sW)
+        for row, name in self.fields.items():
+            text = self._cellvalues[row][0]
+            blank = BLANK_RE.search(text)
+            style = self._cellStyles[row][0]
+            bottom = self._rowpositions[row + 1]
+            height = self._rowpositions[row] - bottom
+            # Same baseline Table._drawCell uses for a single-line MIDDLE cell
+            baseline = bottom + (style.bottomPadding + height - style.topPadding + style.leading) / 2.0 - style.fontsize
+            prefix = pdfmetrics.stringWidth(text[:blank.start()], style.fontname, style.fontsize)
+            self.layout[name] = {'page': canvas.getPageNumber(),
+                                 'x': x + self._colpositions[0] + style.leftPadding + prefix,
+                                 'y': y + baseline,
+                                 'width': pdfmetrics.stringWidth(blank.group(0), style.fontname, style.fontsize),
+                                 'font': style.fontname, 'size': style.fontsize, 'align': 'left'}
+
+
+# Emergency Contact Card rows with a blank the buyer can have pre-filled
+CARD_FIELDS = {
+    2: 'sponsor',
+    3: 'sponsor_phone',
+    5: 'therapist',
+    6: 'therapist_phone',
+    8: 'partner',
+    9: 'partner_phone',
+    14: 'sobriety_date',
+    16: 'days_sober',
+}
+
+
+def create_recovery_toolkit_pdf(pdf_file="client/public/recovery-toolkit.pdf", field_layout=None,
+                                deterministic=False, linearize=False):
+    """
+    Generate the Recovery Toolkit PDF with proper UTF-8 encoding
+
+    Args:
+        pdf_file: Where to save the PDF: a file path, a writable binary file
+            object (socket file, HTTP response, BytesIO), or None to get bytes
+        field_layout: Optional dict, filled with the page and position of
+            every personalizable field (see personalize_toolkit.py)
+        deterministic: Byte-stable output (fixed document ID, date pinned to
+            SOURCE_DATE_EPOCH or 2000-01-01); a file path also gets a
+            .pdf.json sidecar with its content hash and ETag
+        linearize: Write a linearized ("fast web view") PDF, see
+            pdf-templates/pdf_linearize.py
+
+    Returns:
+        pdf_file, or the PDF bytes when pdf_file is None
+    """
+    
+    # Create PDF
+    target = io.BytesIO() if pdf_file is None or linearize else pdf_file
+    doc = SimpleDocTemplate(target, pagesize=letter,
+                           rightMargin=0.75*inch, leftMargin=0.75*inch,
+                           topMargin=0.75*inch, bottomMargin=0.75*inch,
+                           invariant=1 if deterministic else None)
+    
+    # Container for the 'Flowable' objects
+    elements = []
+    
+    # Define styles
+    styles = get_styles()
+    title_style = styles['title']
+    subtitle_style = styles['subtitle']
+    heading2_style = styles['heading2']
+    heading3_style = styles['heading3']
+    body_style = styles['body']
+    
     # Title Page
     elements.append(Spacer(1, 1*inch))
     elements.append(Paragraph("The Recovery Toolkit", title_style))
     elements.append(Paragraph("Practical Worksheets for Your Journey", subtitle_style))
     elements.append(Spacer(1, 0.3*inch))
     elements.append(Paragraph("By Shaun Critzer", subtitle_style))
+    elements.append(FieldAnchor('name', field_layout))
     elements.append(Spacer(1, 0.5*inch))
     elements.append(Paragraph("A collection of tools, exercises, and resources to support your recovery journey—whether you're in active addiction, early recovery, or supporting someone who is.", body_style))
     
@@ -261,7 +378,7 @@ def create_recovery_toolkit_pdf():
         ['before I use.']
     ]
     
-    card_table = Table(card_data, colWidths=[5*inch])
+    card_table = FieldTable(card_data, CARD_FIELDS, field_layout, colWidths=[5*inch])
     card_table.setStyle(TableStyle([
         ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
         ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
@@ -359,7 +476,25 @@ def create_recovery_toolkit_pdf():
     
     # Build PDF
     doc.build(elements)
-    print(f"PDF created successfully: {pdf_file}")
+    if linearize or deterministic:
+        if PDF_TEMPLATES_DIR not in sys.path:
+            sys.path.append(PDF_TEMPLATES_DIR)
+    if linearize:
+        from pdf_linearize import linearize_pdf
+        data = linearize_pdf(target.getvalue(), pdf_file)
+        if pdf_file is None:
+            return data
+    elif pdf_file is None:
+        return target.getvalue()
+    if isinstance(pdf_file, (str, os.PathLike)):
+        if deterministic:
+            from pdf_manifest import write_manifest
+            manifest = write_manifest(pdf_file)
+            print(f"PDF created successfully: {pdf_file} (ETag {manifest['etag']})")
+        else:
+            print(f"PDF created successfully: {pdf_file}")
+    return pdf_file
 
 if __name__ == "__main__":
-    create_recovery_toolkit_pdf()
+    create_recovery_toolkit_pdf(deterministic='--deterministic' in sys.argv[1:],
+                                linearize='--linearize' in sys.argv[1:])
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Static lesson catalog snapshots
+
+Course pages ask the lessons table for data that only changes when the
+lessons are reseeded. After every seed, seed-lessons.py (and seed_loader.py
+for its lessons dataset) also writes each product's lessons out as JSON:
+
+    catalog/7-day-reset.json
+        The full snapshot: every lesson with its id and media URLs. Paid
+        content, so it stays out of the static site; the server answers
+        members.getCourseContent from it (after the access check) instead
+        of querying the lessons table (see server/lessonCatalog.ts). The
+        server deletes it whenever it writes those lessons itself (admin
+        reseed, new thumbnails or videos); run this again to bring it back.
+
+    client/public/catalog/7-day-reset.json
+    client/public/catalog/7-day-reset.3f9a1c2b7d4e.json
+        The public outline: day, title and duration of each lesson, nothing
+        else. Shipped with the static site, the second copy content-addressed
+        so the CDN can cache it forever.
+
+    {"schema":1,"productId":"7-day-reset","contentHash":"3f9a1c2b7d4e...",
+     "lessonCount":7,"totalMinutes":357,"minutesByDay":{"1":45,...},
+     "lessons":[{"dayNumber":1,"title":"...","durationMinutes":45},...]}
+
+Like the seeder, each day counts once (its lowest id wins). contentHash is
+the SHA-256 of everything but the lesson ids, so snapshots built from the
+seed data and from the database agree, and a reseed that changes nothing
+leaves the files alone. Neither directory is committed.
+
+    python3 lesson_catalog.py                  # snapshots from DATABASE_URL
+    python3 lesson_catalog.py --from-seed      # outlines from seed-lessons.py, no database
+    python3 lesson_catalog.py --check          # exit 1 when a snapshot is missing or stale
+"""
+
+import argparse
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sys
+
+from seed_loader import PARAMS, connect
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT_DIR = os.path.join(HERE, 'catalog')
+PUBLIC_DIR = os.path.join(HERE, 'client', 'public', 'catalog')
+
+# Bump when the snapshot layout changes incompatibly
+SCHEMA_VERSION = 1
+
+# Characters of contentHash in the content-addressed file name
+HASH_PREFIX = 12
+
+# Snapshot field -> lessons column, in output order
+COLUMNS = {
+    'id': 'id',
+    'dayNumber': 'day_number',
+    'title': 'title',
+    'description': 'description',
+    'videoUrl': 'video_url',
+    'posterUrl': 'poster_url',
+    'slideshowUrl': 'slideshow_url',
+    'workbookUrl': 'workbook_url',
+    'durationMinutes': 'duration_minutes',
+}
+
+# The only fields that go into the public outline
+PUBLIC_FIELDS = ('dayNumber', 'title', 'durationMinutes')
+
+
+def encode(value):
+    """Compact, key-order-stable JSON bytes"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def has_ids(lessons):
+    return all(lesson.get('id') is not None for lesson in lessons)
+
+
+def build_snapshot(product_id, lessons, fields=tuple(COLUMNS)):
+    """
+    Snapshot of one product's lessons
+
+    Args:
+        lessons: Lesson dicts with the seed data's camelCase keys (id is
+            left out when it isn't known yet)
+        fields: Lesson fields to keep (PUBLIC_FIELDS for the outline)
+
+    Returns:
+        The snapshot dict, contentHash included
+    """
+    ordered = sorted(lessons, key=lambda lesson: (lesson['dayNumber'], lesson.get('id') or 0))
+    by_day = {}
+    for lesson in ordered:
+        # Duplicates of a day that --prune hasn't removed yet
+        by_day.setdefault(lesson['dayNumber'], lesson)
+    compact = [{field: lesson[field] for field in fields if lesson.get(field) is not None}
+               for lesson in by_day.values()]
+    minutes_by_day = {str(day): lesson.get('durationMinutes') or 0 for day, lesson in by_day.items()}
+
+    snapshot = {
+        'schema': SCHEMA_VERSION,
+        'productId': product_id,
+        'lessonCount': len(compact),
+        'totalMinutes': sum(minutes_by_day.values()),
+        'minutesByDay': minutes_by_day,
+        'lessons': compact,
+    }
+    hashed = dict(snapshot, lessons=[{k: v for k, v in lesson.items() if k != 'id'} for lesson in compact])
+    content_hash = hashlib.sha256(encode(hashed)).hexdigest()
+    return {'schema': SCHEMA_VERSION, 'productId': product_id, 'contentHash': content_hash,
+            **{key: value for key, value in snapshot.items() if key not in ('schema', 'productId')}}
+
+
+def build_outline(product_id, lessons):
+    """The public outline of one product's lessons: no ids, no media URLs"""
+    return build_snapshot(product_id, lessons, PUBLIC_FIELDS)
+
+
+def snapshot_paths(out_dir, product_id, content_hash):
+    """Returns (current path, content-addressed path)"""
+    return (os.path.join(out_dir, f"{product_id}.json"),
+            os.path.join(out_dir, f"{product_id}.{content_hash[:HASH_PREFIX]}.json"))
+
+
+def read_snapshot(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def is_current(snapshot, out_dir, addressed=False):
+    """Whether out_dir already holds exactly this snapshot"""
+    current, addressed_path = snapshot_paths(out_dir, snapshot['productId'], snapshot['contentHash'])
+    return read_snapshot(current) == snapshot and (not addressed or os.path.exists(addressed_path))
+
+
+def _write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(snapshot, out_dir=DEFAULT_OUT_DIR, addressed=False):
+    """
+    Write a snapshot, and with addressed a content-addressed copy too
+    (dropping older copies)
+
+    Returns:
+        (current path, whether anything was written)
+    """
+    product_id = snapshot['productId']
+    current, addressed_path = snapshot_paths(out_dir, product_id, snapshot['contentHash'])
+    if is_current(snapshot, out_dir, addressed):
+        return current, False
+
+    os.makedirs(out_dir, exist_ok=True)
+    data = encode(snapshot)
+    if addressed:
+        # Content-addressed copy first, so the current file never points at a missing version
+        _write(addressed_path, data)
+    _write(current, data)
+    if addressed:
+        stale = re.compile(re.escape(product_id) + r'\.[0-9a-f]{%d}\.json$' % HASH_PREFIX)
+        for path in glob.glob(os.path.join(out_dir, f"{glob.escape(product_id)}.*.json")):
+            if path != addressed_path and stale.match(os.path.basename(path)):
+                os.remove(path)
+    return current, True
+
+
+def group_by_product(lessons):
+    products = {}
+    for lesson in lessons:
+        products.setdefault(lesson['productId'], []).append(lesson)
+    return products
+
+
+def planned_snapshots(lessons, out_dir=DEFAULT_OUT_DIR, public_dir=PUBLIC_DIR):
+    """
+    (snapshot, directory, content-addressed) for every file lessons should
+    produce; the full snapshot needs lesson ids, so it is skipped without them
+    """
+    planned = []
+    for product_id, product_lessons in sorted(group_by_product(lessons).items()):
+        if has_ids(product_lessons):
+            planned.append((build_snapshot(product_id, product_lessons), out_dir, False))
+        planned.append((build_outline(product_id, product_lessons), public_dir, True))
+    return planned
+
+
+def write_catalog(lessons, out_dir=DEFAULT_OUT_DIR, public_dir=PUBLIC_DIR):
+    """
+    Write the full snapshot and public outline of every product in lessons
+
+    Returns:
+        List of (snapshot, current path, whether it was written)
+    """
+    written = []
+    for snapshot, directory, addressed in planned_snapshots(lessons, out_dir, public_dir):
+        path, changed = write_snapshot(snapshot, directory, addressed)
+        written.append((snapshot, path, changed))
+    return written
+
+
+def stale_snapshots(lessons, out_dir=DEFAULT_OUT_DIR, public_dir=PUBLIC_DIR):
+    """Paths of the snapshots that are missing or don't match lessons"""
+    return [snapshot_paths(directory, snapshot['productId'], snapshot['contentHash'])[0]
+            for snapshot, directory, addressed in planned_snapshots(lessons, out_dir, public_dir)
+            if not is_current(snapshot, directory, addressed)]
+
+
+def fetch_lessons(cursor, dialect, product_ids=None):
+    """Lesson rows from the database as snapshot-ready dicts (ids included)"""
+    columns = ['product_id', *COLUMNS.values()]
+    query = f"SELECT {', '.join(columns)} FROM lessons"
+    params = ()
+    if product_ids:
+        query += f" WHERE product_id IN ({', '.join([PARAMS[dialect]] * len(product_ids))})"
+        params = tuple(product_ids)
+    cursor.execute(query + " ORDER BY product_id, day_number, id", params)
+    lessons = []
+    for values in cursor.fetchall():
+        row = dict(zip(columns, values))
+        lessons.append({'productId': row['product_id'],
+                        **{field: row[column] for field, column in COLUMNS.items()}})
+    return lessons
+
+
+def snapshot_from_database(conn, dialect, product_ids=None, out_dir=DEFAULT_OUT_DIR, public_dir=PUBLIC_DIR):
+    """Refresh the snapshots of these products (default: all) from the lessons table"""
+    cursor = conn.cursor()
+    try:
+        lessons = fetch_lessons(cursor, dialect, product_ids)
+    finally:
+        cursor.close()
+    return write_catalog(lessons, out_dir, public_dir)
+
+
+def seed_lessons(path=os.path.join(HERE, 'seed-lessons.py')):
+    """The lessons list from seed-lessons.py (no ids, those come from the database)"""
+    spec = importlib.util.spec_from_file_location('seed_lessons', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.lessons
+
+
+def print_catalog(written):
+    for snapshot, path, changed in written:
+        print(f"   {'✓' if changed else '='} {os.path.relpath(path, HERE):<45} "
+              f"{snapshot['lessonCount']:>3} lessons {snapshot['totalMinutes']:>5} min  "
+              f"{snapshot['contentHash'][:HASH_PREFIX]}{'' if changed else '  (unchanged)'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write static lesson catalog snapshots")
+    parser.add_argument('products', nargs='*', help="Product ids (default: every product)")
+    parser.add_argument('-o', '--out-dir', default=DEFAULT_OUT_DIR,
+                        help="Full snapshots, kept out of the static site (default: catalog)")
+    parser.add_argument('--public-dir', default=PUBLIC_DIR,
+                        help="Public outlines (default: client/public/catalog)")
+    parser.add_argument('--from-seed', action='store_true',
+                        help="Build the outlines from seed-lessons.py instead of the database")
+    parser.add_argument('--check', action='store_true', help="Only report snapshots that are missing or stale")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help="Defaults to the DATABASE_URL environment variable")
+    args = parser.parse_args(argv)
+
+    if args.from_seed:
+        lessons = seed_lessons()
+    else:
+        if not args.database_url:
+            print("❌ DATABASE_URL environment variable not set (or use --from-seed)")
+            return 1
+        conn, dialect = connect(args.database_url)
+        try:
+            cursor = conn.cursor()
+            lessons = fetch_lessons(cursor, dialect, args.products or None)
+            cursor.close()
+        finally:
+            conn.close()
+    if args.products:
+        lessons = [lesson for lesson in lessons if lesson['productId'] in args.products]
+    if not lessons:
+        print("❌ No lessons found")
+        return 1
+
+    if args.check:
+        stale = stale_snapshots(lessons, args.out_dir, args.public_dir)
+        for path in stale:
+            print(f"   ✗ {os.path.relpath(path, HERE)}")
+        print(f"{'❌' if stale else '✅'} {len(stale)} snapshot(s) missing or stale")
+        return 1 if stale else 0
+
+    print("📦 Lesson catalog snapshots")
+    print_catalog(write_catalog(lessons, args.out_dir, args.public_dir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
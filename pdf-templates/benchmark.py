@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for both PDF engines
+
+Measures generate_pdf() (WeasyPrint, via PdfRenderer) and the Recovery
+Toolkit's ReportLab pipeline on synthetic documents of 1, 10, 100 and 500
+pages plus the real lead_magnets/ and products/ sources, reporting wall time,
+pages per second, peak RSS and output bytes for each case.
+
+Every case runs in its own fresh process so peak RSS belongs to that case
+alone. The process does one untimed warm-up render first, so the numbers are
+steady-state layout cost rather than import and font discovery.
+
+    python3 benchmark.py --save benchmarks/baseline.json
+    python3 benchmark.py --baseline benchmarks/baseline.json --threshold 15
+
+With --baseline the run exits non-zero when any case is more than
+--threshold percent slower than its recorded wall time.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import contextlib
+import importlib.metadata
+import io
+import json
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(HERE, '..'))
+
+SYNTHETIC_SIZES = (1, 10, 100, 500)
+
+PAGE_OBJECT_RE = re.compile(rb'/Type\s*/Page\b(?!s)')
+
+
+def synthetic_html(pages):
+    """Template HTML with one forced page per section, exercising the common components"""
+    sections = []
+    for page in range(1, pages + 1):
+        sections.append(f"""
+    <h2>Section {page}: Understanding Your Patterns</h2>
+    <p>Recovery isn't just about not drinking or using. It's about becoming whole: processing
+    trauma, building authentic relationships, and creating a life worth staying sober for.
+    These exercises only work if you use them, so take your time with each one.</p>
+    <div class="section-box">
+        <h3>Why This Matters</h3>
+        <p>Your nervous system is doing exactly what it was designed to do: protect you.</p>
+    </div>
+    <ul class="checklist">
+        <li>Did I get enough sleep?</li>
+        <li>What am I grateful for right now?</li>
+        <li>Who can I reach out to if I struggle today?</li>
+    </ul>
+    <div class="tip-box">Most intense urges peak within 15-20 minutes.</div>
+    <div class="page-break"></div>""")
+    return ''.join(sections)
+
+
+def synthetic_elements(pages):
+    """ReportLab flowables equivalent to synthetic_html()"""
+    from generate_recovery_toolkit import get_styles
+    from reportlab.platypus import PageBreak, Paragraph
+
+    styles = get_styles()
+    elements = []
+    for page in range(1, pages + 1):
+        elements.append(Paragraph(f"Section {page}: Understanding Your Patterns", styles['heading2']))
+        elements.append(Paragraph(
+            "Recovery isn't just about not drinking or using. It's about becoming whole: processing "
+            "trauma, building authentic relationships, and creating a life worth staying sober for. "
+            "These exercises only work if you use them, so take your time with each one.",
+            styles['body']))
+        elements.append(Paragraph("<b>Why This Matters</b>", styles['heading3']))
+        elements.append(Paragraph(
+            "Your nervous system is doing exactly what it was designed to do: protect you.", styles['body']))
+        for item in ("Did I get enough sleep?", "What am I grateful for right now?",
+                     "Who can I reach out to if I struggle today?"):
+            elements.append(Paragraph(f"☐ {item}", styles['body']))
+        elements.append(Paragraph("TIP: Most intense urges peak within 15-20 minutes.", styles['body']))
+        elements.append(PageBreak())
+    return elements
+
+
+def discover_cases(sizes=SYNTHETIC_SIZES, engines=('weasyprint', 'reportlab'), real=True):
+    """Case names understood by run_case()"""
+    cases = []
+    for engine in engines:
+        cases.extend(f"{engine}:synthetic-{size}" for size in sizes)
+    if real and 'weasyprint' in engines:
+        sys.path.insert(0, HERE)
+        from generate_pdf import discover_sources
+        cases.extend(f"weasyprint:{os.path.relpath(path, REPO_ROOT)}" for path in discover_sources())
+    if real and 'reportlab' in engines:
+        cases.append('reportlab:recovery-toolkit')
+    return cases
+
+
+def _render_weasyprint(case, output_path):
+    from generate_pdf import get_renderer, read_markdown_source
+
+    renderer = get_renderer()
+    if case.startswith('synthetic-'):
+        pages = int(case.split('-')[1])
+        document = renderer.write_pdf("Benchmark", "Synthetic Document", synthetic_html(pages), output_path)
+    else:
+        title, subtitle, content_html = read_markdown_source(os.path.join(REPO_ROOT, case))
+        document = renderer.write_pdf(title, subtitle, content_html, output_path)
+    return len(document.pages)
+
+
+def _render_reportlab(case, output_path):
+    from generate_recovery_toolkit import create_recovery_toolkit_pdf
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate
+
+    if case == 'recovery-toolkit':
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_recovery_toolkit_pdf(output_path)
+        with open(output_path, 'rb') as f:
+            return len(PAGE_OBJECT_RE.findall(f.read()))
+
+    pages = int(case.split('-')[1])
+    doc = SimpleDocTemplate(output_path, pagesize=letter,
+                            rightMargin=0.75*inch, leftMargin=0.75*inch,
+                            topMargin=0.75*inch, bottomMargin=0.75*inch)
+    doc.build(synthetic_elements(pages))
+    return doc.page
+
+
+def run_case(name, repeat=3):
+    """
+    Time one case inside the current (fresh) process
+
+    Returns:
+        dict with wall_seconds (median), pages, pages_per_second,
+        peak_rss_kb and bytes
+    """
+    sys.path[:0] = [HERE, REPO_ROOT]
+    engine, case = name.split(':', 1)
+    render = _render_weasyprint if engine == 'weasyprint' else _render_reportlab
+
+    with tempfile.TemporaryDirectory(prefix='pdf-benchmark-') as tmp_dir:
+        output_path = os.path.join(tmp_dir, 'out.pdf')
+        # Untimed warm-up: imports, template/style parsing, font discovery
+        render('synthetic-1', output_path)
+
+        timings = []
+        pages = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            pages = render(case, output_path)
+            timings.append(time.perf_counter() - started)
+        size = os.path.getsize(output_path)
+
+    wall = statistics.median(timings)
+    return {
+        'wall_seconds': round(wall, 4),
+        'pages': pages,
+        'pages_per_second': round(pages / wall, 2) if wall else None,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'bytes': size,
+    }
+
+
+def run_suite(cases, repeat=3):
+    """Run each case in its own fresh process, one at a time"""
+    results = {}
+    ctx = multiprocessing.get_context('spawn')
+    for name in cases:
+        # A one-process pool that is thrown away after each case keeps peak
+        # RSS and caches from leaking between cases
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            try:
+                results[name] = pool.submit(run_case, name, repeat).result()
+            except Exception as e:
+                results[name] = {'error': f"{type(e).__name__}: {e}"}
+        print_result(name, results[name])
+    return results
+
+
+def environment():
+    info = {'python': platform.python_version(), 'machine': platform.machine(),
+            'cpus': os.cpu_count()}
+    for package in ('weasyprint', 'reportlab'):
+        try:
+            info[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            info[package] = None
+    return info
+
+
+def print_result(name, result):
+    if 'error' in result:
+        print(f"   ✗ {name:<58} {result['error']}")
+        return
+    print(f"   ✓ {name:<58} {result['wall_seconds']:>8.3f}s {result['pages']:>5} pages "
+          f"{result['pages_per_second'] or 0:>8.1f} p/s {result['peak_rss_kb'] / 1024:>7.1f} MB "
+          f"{result['bytes'] / 1024:>9.1f} KB")
+
+
+def compare(results, baseline, threshold):
+    """Return the cases more than threshold percent slower than the baseline"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or 'error' in result or 'error' in previous:
+            continue
+        change = (result['wall_seconds'] - previous['wall_seconds']) / previous['wall_seconds'] * 100
+        marker = '⚠️ ' if change > threshold else '  '
+        print(f" {marker} {name:<58} {previous['wall_seconds']:>8.3f}s -> "
+              f"{result['wall_seconds']:>8.3f}s ({change:+.1f}%)")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the WeasyPrint and ReportLab PDF engines")
+    parser.add_argument('--engine', choices=['weasyprint', 'reportlab'], action='append',
+                        help="Only benchmark this engine (repeatable, default: both)")
+    parser.add_argument('--sizes', default=','.join(map(str, SYNTHETIC_SIZES)),
+                        help="Synthetic page counts (default: %(default)s)")
+    parser.add_argument('--no-real', action='store_true', help="Skip the real catalog documents")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case, median is kept")
+    parser.add_argument('--save', help="Write results to this JSON baseline file")
+    parser.add_argument('--baseline', help="Compare against this JSON baseline file")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Fail when a case is more than this percent slower (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    cases = discover_cases(sizes, args.engine or ('weasyprint', 'reportlab'), not args.no_real)
+
+    print(f"⏱️  Benchmarking {len(cases)} cases ({args.repeat} runs each)")
+    results = run_suite(cases, args.repeat)
+    report = {'environment': environment(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'results': results}
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\n✓ Baseline saved: {args.save}")
+
+    failed = any('error' in result for result in results.values())
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\n📊 Compared with {args.baseline} (threshold {args.threshold:g}%)")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} case(s) regressed: {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Local font registry for the REWIRED template
+
+The template library (templates/) asks for 'Inter' and 'Playfair Display'.
+Any font files for them placed in fonts/ next to this module are registered
+once per process through generated @font-face rules, instead of letting
+fontconfig go looking for the families on every render. The repository does
+not ship those files (see fonts/README.md): without them every render falls
+back to whatever fontconfig finds, so text metrics, and with them the
+output, can differ between machines.
+
+The rules are parsed into the renderer's shared FontConfiguration, so each
+font file is loaded once per process rather than once per render. On top of
+that, WeasyPrint's per-document subsetting (and variable font instancing) is
+memoized by font + glyph set, so documents that use the same glyphs, such as
+re-renders and personalised copies, skip fontTools/HarfBuzz entirely.
+"""
+
+from collections import OrderedDict, namedtuple
+import hashlib
+import json
+import os
+import pathlib
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_DIR = os.path.join(BASE_DIR, 'fonts')
+
+# The families last reported missing, so the warning isn't repeated on every run
+WARNING_STAMP = os.path.join(BASE_DIR, '.cache', 'missing-fonts.json')
+
+# File name prefix -> CSS family name used by the template
+FAMILIES = {
+    'Inter': 'Inter',
+    'PlayfairDisplay': 'Playfair Display',
+}
+
+WEIGHTS = {
+    'Thin': 100, 'ExtraLight': 200, 'Light': 300, 'Regular': 400, 'Medium': 500,
+    'SemiBold': 600, 'Bold': 700, 'ExtraBold': 800, 'Black': 900,
+}
+
+# WeasyPrint's @font-face only takes single weights, so a variable font is
+# registered once for each weight the template actually uses
+TEMPLATE_WEIGHTS = (400, 600, 700, 800)
+
+FORMATS = {'.woff2': 'woff2', '.woff': 'woff', '.ttf': 'truetype', '.otf': 'opentype'}
+
+# "Inter-SemiBoldItalic.ttf", "PlayfairDisplay-Bold.ttf", "Inter[opsz,wght].ttf",
+# "Inter-Variable.woff2", "PlayfairDisplay-Italic[wght].ttf"
+FILE_NAME_RE = re.compile(r'^(?P<family>[A-Za-z]+?)(?:-(?P<variant>[A-Za-z]+))?(?P<axes>\[[^\]]*\])?$')
+
+# Subset results kept per process; each entry is one font's glyph set
+SUBSET_CACHE_SIZE = 128
+
+FontFace = namedtuple('FontFace', ['family', 'weight', 'style', 'path', 'format'])
+
+
+def parse_font_file_name(path):
+    """Return the FontFaces a font file in fonts/ provides (empty if it isn't one)"""
+    stem, ext = os.path.splitext(os.path.basename(path))
+    match = FILE_NAME_RE.match(stem)
+    if ext.lower() not in FORMATS or not match or match.group('family') not in FAMILIES:
+        return []
+
+    variant = match.group('variant') or 'Regular'
+    style = 'normal'
+    if variant.endswith('Italic'):
+        style = 'italic'
+        variant = variant[:-len('Italic')] or 'Regular'
+
+    if match.group('axes') or variant == 'Variable':
+        weights = TEMPLATE_WEIGHTS
+    elif variant in WEIGHTS:
+        weights = (WEIGHTS[variant],)
+    else:
+        return []
+
+    family = FAMILIES[match.group('family')]
+    return [FontFace(family, weight, style, os.path.abspath(path), FORMATS[ext.lower()])
+            for weight in weights]
+
+
+class FontRegistry:
+    """
+    The font files found in fonts/ and the @font-face rules that register them
+
+    Args:
+        font_dir: Directory holding the .woff2/.woff/.ttf/.otf files
+    """
+
+    def __init__(self, font_dir=FONT_DIR):
+        self.font_dir = font_dir
+        self.faces = []
+        if os.path.isdir(font_dir):
+            for name in sorted(os.listdir(font_dir)):
+                self.faces.extend(parse_font_file_name(os.path.join(font_dir, name)))
+
+    def missing_families(self):
+        """Template families with no file in fonts/ (these fall back to fontconfig)"""
+        found = {face.family for face in self.faces}
+        return [family for family in FAMILIES.values() if family not in found]
+
+    def font_face_css(self):
+        """@font-face rules for every font file found"""
+        rules = []
+        for face in self.faces:
+            rules.append(
+                "@font-face {\n"
+                f"    font-family: '{face.family}';\n"
+                f"    src: url('{pathlib.Path(face.path).as_uri()}') format('{face.format}');\n"
+                f"    font-weight: {face.weight};\n"
+                f"    font-style: {face.style};\n"
+                "}"
+            )
+        return '\n'.join(rules)
+
+    def fingerprint(self):
+        """Hash of the font files found, changes whenever one does"""
+        digest = hashlib.sha256()
+        for path in sorted({face.path for face in self.faces}):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+
+_registry = None
+
+
+def get_font_registry():
+    """Return this process's FontRegistry, scanning fonts/ on first use"""
+    global _registry
+    if _registry is None:
+        _registry = FontRegistry()
+    return _registry
+
+
+def reset():
+    """Forget the scanned fonts, so the next get_font_registry() rescans fonts/"""
+    global _registry
+    _registry = None
+
+
+_warned = False
+
+
+def warn_missing_fonts():
+    """
+    Print the fallback warning for template families with no file in fonts/,
+    once per process, and in later runs only when the missing set changes
+
+    Returns:
+        The missing families
+    """
+    global _warned
+    missing = get_font_registry().missing_families()
+    if _warned or not missing:
+        return missing
+    _warned = True
+    try:
+        with open(WARNING_STAMP, 'r', encoding='utf-8') as f:
+            if json.load(f) == missing:
+                return missing
+    except (FileNotFoundError, ValueError):
+        pass
+    print(f"⚠️  No font files in fonts/ for {', '.join(missing)} - "
+          "falling back to system fonts (see fonts/README.md; shown once)")
+    try:
+        os.makedirs(os.path.dirname(WARNING_STAMP), exist_ok=True)
+        tmp_path = f"{WARNING_STAMP}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(missing, f)
+        os.replace(tmp_path, WARNING_STAMP)
+    except OSError:
+        pass
+    return missing
+
+
+_subset_cache = OrderedDict()
+_subset_stats = {'hits': 0, 'misses': 0}
+
+
+def install_subset_cache():
+    """
+    Memoize WeasyPrint's font subsetting by font content and glyph set
+
+    WeasyPrint calls Font.clean() once per font per document to subset it
+    (and to instance variable fonts). The result only depends on the font
+    bytes, the glyphs used and a few face settings, so identical requests are
+    answered from an in-process LRU cache. Does nothing if the WeasyPrint
+    internals it relies on are not there.
+    """
+    try:
+        from weasyprint.pdf.fonts import Font
+    except ImportError:
+        return False
+    if getattr(Font.clean, '_rewired_memoized', False):
+        return True
+
+    original_clean = Font.clean
+
+    def clean(self, to_unicode, hinting):
+        key = (
+            hashlib.sha1(self.file_content).digest(),
+            tuple(sorted(to_unicode)) if to_unicode else (),
+            bool(hinting),
+            tuple(sorted(self.variations.items())),
+            getattr(self, 'weight', None),
+            getattr(self, 'style', None),
+            getattr(self, 'font_size', None),
+            bool(getattr(self, 'missing', None)),
+        )
+        cached = _subset_cache.get(key)
+        if cached is not None:
+            _subset_cache.move_to_end(key)
+            _subset_stats['hits'] += 1
+            self.file_content, variations = cached
+            self.variations.update(variations)
+            return
+        _subset_stats['misses'] += 1
+        original_clean(self, to_unicode, hinting)
+        _subset_cache[key] = (self.file_content, dict(self.variations))
+        if len(_subset_cache) > SUBSET_CACHE_SIZE:
+            _subset_cache.popitem(last=False)
+
+    clean._rewired_memoized = True
+    Font.clean = clean
+    return True
+
+
+def subset_cache_stats():
+    """Hit/miss counts and size of the subset cache in this process"""
+    return {**_subset_stats, 'entries': len(_subset_cache)}
@@ -2,14 +2,451 @@
 """
 Professional PDF Generator for REWIRED Resources
 Uses WeasyPrint to convert HTML templates to beautiful PDFs
+
+WeasyPrint (and the Pango/HarfBuzz libraries it loads) is only imported
+when a PDF is actually laid out, so HTML previews and cache hits start
+in milliseconds:
+
+    python3 generate_pdf.py render ../products/foo.md -o foo.pdf
+    python3 generate_pdf.py preview-html ../products/foo.md
+    python3 generate_pdf.py batch
 """
 
-from weasyprint import HTML, CSS
-from jinja2 import Template
+from font_registry import get_font_registry, install_subset_cache, warn_missing_fonts
+from markdown_pipeline import convert_markdown
+from template_library import DEFAULT_TEMPLATE, ensure_compiled, library_hash, load_template, template_names
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import argparse
+import glob
+import hashlib
+import json
 import os
+import re
 import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Sources picked up by the batch build, relative to the repo root
+CATALOG_GLOBS = ['products/*.md', 'lead_magnets/*.md']
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ChunkedWriter:
+    """
+    Write-only file object that hands the PDF on in chunks as it is produced
+
+    WeasyPrint writes the PDF object by object, so passing one of these as
+    the output sends data to a socket or HTTP response while the rest of the
+    file is still being written, with no temp file and no full copy in memory.
+
+    Args:
+        send: Callable taking a bytes chunk, e.g. socket.sendall or a
+            response's write()
+        chunk_size: Bytes buffered before each send() call
+    """
+
+    def __init__(self, send, chunk_size=STREAM_CHUNK_SIZE):
+        self.send = send
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.bytes_written += len(data)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            self.send(bytes(self.buffer))
+            self.buffer.clear()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PdfRenderer:
+    """
+    Long-lived REWIRED renderer
+
+    Loads one template from the library once (see template_library.py),
+    pre-parses its stylesheet into a reusable CSS object and shares one
+    FontConfiguration across
+    every render, so repeated renders only pay for layout and PDF output.
+    Any font files in fonts/ are registered on that FontConfiguration
+    through @font-face (see font_registry.py; none are committed, so by
+    default fontconfig picks the fonts). WeasyPrint itself is imported
+    and the stylesheet parsed on the first PDF render, not here.
+
+    Args:
+        template: Library template to render with (workbook, worksheet,
+            handout, manuscript)
+        font_registry: FontRegistry to register (defaults to fonts/)
+        metrics_sink: Optional callable receiving a per-phase timing record
+            for every render (see render_metrics.py)
+        cache: Optional RenderCache that cached_pdf() reads and fills
+            (see render_cache.py)
+        deterministic: Byte-stable output: the file ID is derived from the
+            inputs and the document date pinned to SOURCE_DATE_EPOCH (or
+            left out), see pdf_manifest.py
+        memory_budget: Bytes a single render may grow the process by before
+            it is aborted with MemoryBudgetExceeded (0 = measure only,
+            None = off); each render's figures end up in last_memory, see
+            render_memory.py
+        trace_memory: Also hold the Python heap (tracemalloc) to the budget
+    """
+
+    def __init__(self, template=DEFAULT_TEMPLATE, font_registry=None, metrics_sink=None, cache=None,
+                 deterministic=False, memory_budget=None, trace_memory=False):
+        self.template_name = template
+        self.fonts = font_registry or get_font_registry()
+        self.base_url = BASE_DIR
+        self.metrics_sink = metrics_sink
+        self.cache = cache
+        self.deterministic = deterministic
+        self.memory_budget = memory_budget
+        self.trace_memory = trace_memory
+        self.last_memory = None
+        self._cache_prefix = None
+        self.setup_phases = {}
+
+        started = time.perf_counter()
+        self.template, self.css_text = load_template(template)
+        self.setup_phases['template_load'] = time.perf_counter() - started
+        self.template_hash = hashlib.sha256(f"{library_hash()}:{template}".encode('utf-8')).hexdigest()
+        self._font_config = None
+        self._stylesheet = None
+
+    def _load_engine(self):
+        """Import WeasyPrint and parse the template's stylesheet against the fonts"""
+        started = time.perf_counter()
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+        install_subset_cache()
+        imported = time.perf_counter()
+        self._font_config = FontConfiguration()
+        self._stylesheet = CSS(string=self.fonts.font_face_css() + '\n' + self.css_text,
+                               base_url=self.base_url, font_config=self._font_config)
+        if self.setup_phases is not None:
+            self.setup_phases['engine_import'] = imported - started
+            self.setup_phases['stylesheet_parse'] = time.perf_counter() - imported
+
+    @property
+    def font_config(self):
+        if self._font_config is None:
+            self._load_engine()
+        return self._font_config
+
+    @property
+    def stylesheet(self):
+        if self._stylesheet is None:
+            self._load_engine()
+        return self._stylesheet
+
+    def render_html(self, title, subtitle, content_html, inline_css=False):
+        """
+        Render the template to an HTML string
+
+        Args:
+            title: PDF title
+            subtitle: Subtitle shown in header
+            content_html: Main content HTML
+            inline_css: Put the stylesheet and @font-face rules back into the
+                page (for previews)
+        """
+        return self.template.render(
+            title=title,
+            subtitle=subtitle,
+            content=content_html,
+            inline_css=inline_css,
+            font_face_css=self.fonts.font_face_css() if inline_css else ''
+        )
+
+    def extra_stylesheet(self, css_text):
+        """Parse additional CSS against this renderer's fonts (parse once, reuse)"""
+        from weasyprint import CSS
+        return CSS(string=css_text, base_url=self.base_url, font_config=self.font_config)
+
+    def render(self, title, subtitle, content_html, stylesheets=()):
+        """
+        Lay out the document and return the WeasyPrint Document
+
+        Args:
+            stylesheets: Extra CSS objects (see extra_stylesheet()) applied
+                after the template's own stylesheet
+        """
+        if self.metrics_sink is not None:
+            phases = {}
+            document = self._render_measured(title, subtitle, content_html, stylesheets, phases)
+            self._report(title, phases, document)
+            return document
+
+        from weasyprint import HTML
+        html = HTML(string=self.render_html(title, subtitle, content_html),
+                    base_url=self.base_url)
+        return html.render(font_config=self.font_config,
+                           stylesheets=[self.stylesheet, *stylesheets])
+
+    def write_pdf(self, title, subtitle, content_html, output_path, stylesheets=()):
+        """
+        Render and write the PDF, returning the WeasyPrint Document
+
+        Args:
+            output_path: File path or writable binary file object
+                (socket file, HTTP response, BytesIO, ChunkedWriter)
+
+        Raises:
+            MemoryBudgetExceeded: The render outgrew memory_budget
+        """
+        return self._guarded(self._write_pdf, title, subtitle, content_html, output_path, stylesheets)
+
+    def _write_pdf(self, title, subtitle, content_html, output_path, stylesheets):
+        if self.metrics_sink is not None:
+            from render_metrics import phase
+
+            phases = {}
+            document = self._render_measured(title, subtitle, content_html, stylesheets, phases)
+            options = self.pdf_options(document, title, subtitle, content_html)
+            with phase(phases, 'pdf_write'):
+                document.write_pdf(output_path, **options)
+            self._report(title, phases, document, output_path)
+            return document
+
+        document = self.render(title, subtitle, content_html, stylesheets)
+        document.write_pdf(output_path, **self.pdf_options(document, title, subtitle, content_html))
+        return document
+
+    def pdf_bytes(self, title, subtitle, content_html):
+        """
+        Raises:
+            MemoryBudgetExceeded: The render outgrew memory_budget
+
+        Returns:
+            (PDF bytes, page count)
+        """
+        return self._guarded(self._pdf_bytes, title, subtitle, content_html)
+
+    def _pdf_bytes(self, title, subtitle, content_html):
+        document = self.render(title, subtitle, content_html)
+        return document.write_pdf(**self.pdf_options(document, title, subtitle, content_html)), len(document.pages)
+
+    def _guarded(self, job, *args):
+        """Run one render job under the memory budget, keeping its figures in last_memory"""
+        if self.memory_budget is None:
+            return job(*args)
+        from render_memory import MemoryBudgetExceeded, MemoryGuard
+
+        guard = MemoryGuard(self.memory_budget or None, self.trace_memory)
+        try:
+            return guard.run(job, *args)
+        except MemoryBudgetExceeded as e:
+            guard.stats = e.stats
+            raise
+        finally:
+            self.last_memory = guard.stats
+
+    def pdf_options(self, document, title, subtitle, content_html):
+        """write_pdf() options for a document, pinning its date and file ID in deterministic mode"""
+        if not self.deterministic:
+            return {}
+        from pdf_manifest import source_date
+        document.metadata.created = document.metadata.modified = source_date()
+        return {'pdf_identifier': self.cache_key(title, subtitle, content_html)[:32].encode('ascii')}
+
+    def cache_key(self, title, subtitle, content_html):
+        """Content address of a render: template, fonts, WeasyPrint version and inputs"""
+        if self._cache_prefix is None:
+            self._cache_prefix = json.dumps([self.template_hash, self.fonts.fingerprint(),
+                                             weasyprint_version()]).encode('utf-8')
+        inputs = [title, subtitle, content_html]
+        if self.deterministic:
+            from pdf_manifest import source_date
+            inputs.append(['deterministic', source_date()])
+        digest = hashlib.sha256(self._cache_prefix)
+        digest.update(json.dumps(inputs).encode('utf-8'))
+        return digest.hexdigest()
+
+    def cached_pdf(self, title, subtitle, content_html):
+        """
+        Return the PDF for these inputs from the render cache, rendering and
+        storing it on a miss (renders straight through without a cache)
+
+        Returns:
+            (PDF bytes, page count, whether it was a cache hit)
+        """
+        key = self.cache_key(title, subtitle, content_html) if self.cache else None
+        if key:
+            entry = self.cache.get(key)
+            if entry:
+                data, info = entry
+                return data, info.get('pages'), True
+
+        data, pages = self.pdf_bytes(title, subtitle, content_html)
+        if key:
+            self.cache.put(key, data, {'pages': pages})
+        return data, pages, False
+
+    def thumbnails(self, title, subtitle, content_html, data, options):
+        """
+        Cover thumbnails for a PDF rendered from these inputs, kept in the
+        render cache next to it when there is one (see pdf_thumbnails.py)
+
+        Args:
+            data: The PDF bytes
+            options: make_thumbnails() keyword arguments (pages, widths, image_format)
+        """
+        from pdf_thumbnails import make_thumbnails
+        key = self.cache_key(title, subtitle, content_html) if self.cache else None
+        return make_thumbnails(data, self.cache, key, **options)
+
+    def _render_measured(self, title, subtitle, content_html, stylesheets, phases):
+        """render() with every phase timed into phases"""
+        from render_metrics import phase, weasyprint_phases
+
+        # First render: the engine import is reported as a setup phase
+        stylesheet = self.stylesheet
+        from weasyprint import HTML
+        with phase(phases, 'jinja_render'):
+            html_content = self.render_html(title, subtitle, content_html)
+        with phase(phases, 'html_parse'):
+            html = HTML(string=html_content, base_url=self.base_url)
+        with weasyprint_phases(phases):
+            return html.render(font_config=self.font_config,
+                               stylesheets=[stylesheet, *stylesheets])
+
+    def _report(self, title, phases, document, output_path=None):
+        from render_metrics import build_record
+
+        # One-time setup is only reported with the renderer's first record
+        setup, self.setup_phases = self.setup_phases, None
+        self.metrics_sink(build_record(title, phases, document, output_path, setup))
+
+
+def weasyprint_version():
+    """WeasyPrint's version from its package metadata, without importing it"""
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version('weasyprint')
+    except PackageNotFoundError:
+        from weasyprint import __version__
+        return __version__
+
+
+_renderers = {}
+
+# Settings from set_metrics_sink() / set_render_cache() / set_deterministic(),
+# applied to every renderer this process creates
+_renderer_options = {}
+
+
+def get_renderer(template=None, deterministic=None):
+    """
+    Return this process's shared PdfRenderer for a template, creating it on first use
+
+    Args:
+        deterministic: Byte-stable output or not, regardless of
+            set_deterministic() (None = as configured)
+    """
+    template = template or DEFAULT_TEMPLATE
+    options = dict(_renderer_options)
+    key = template
+    if deterministic is not None and bool(deterministic) != bool(options.get('deterministic')):
+        # Kept apart so set_deterministic() doesn't flip it back
+        options['deterministic'] = bool(deterministic)
+        key = (template, options['deterministic'])
+    if key not in _renderers:
+        _renderers[key] = PdfRenderer(template, **options)
+    return _renderers[key]
+
+
+def reset_renderers():
+    """Drop the shared renderers so the next render reloads templates and fonts"""
+    _renderers.clear()
+
+
+def _configure_renderers(**options):
+    _renderer_options.update(options)
+    for key, renderer in _renderers.items():
+        for name, value in options.items():
+            if name == 'deterministic' and isinstance(key, tuple):
+                continue
+            setattr(renderer, name, value)
+
+
+def set_metrics_sink(sink):
+    """Send per-phase timing records for this process's renders to sink (None = off)"""
+    _configure_renderers(metrics_sink=sink)
+
+
+def set_render_cache(cache):
+    """Serve this process's generate_pdf() and batch renders from cache (None = off)"""
+    _configure_renderers(cache=cache)
+
+
+def set_deterministic(enabled=True):
+    """
+    Byte-stable PDFs from this process, each saved with a content hash / ETag
+    sidecar (see pdf_manifest.py)
+    """
+    _configure_renderers(deterministic=enabled)
+
+
+def set_memory_budget(budget, trace=False, max_drift=None):
+    """
+    Hold each of this process's renders to a memory budget (see render_memory.py)
+
+    Args:
+        budget: Bytes one render may grow the process by (0 = only measure,
+            None = off)
+        trace: Also hold the Python heap, sampled with tracemalloc, to it
+        max_drift: Steady-state growth over the first job's before the
+            worker asks to be recycled
+    """
+    if max_drift is not None:
+        from render_memory import set_max_drift
+        set_max_drift(max_drift)
+    _configure_renderers(memory_budget=budget, trace_memory=trace)
+
+
+def write_output(data, output_path):
+    """Save PDF bytes to a path or file object, or hand them back when output_path is None"""
+    if output_path is None:
+        return data
+    if isinstance(output_path, (str, os.PathLike)):
+        with open(output_path, 'wb') as f:
+            f.write(data)
+    else:
+        output_path.write(data)
+    return output_path
+
+
+def render_html(title, subtitle, content_html, template=None):
+    """
+    Render a REWIRED template to an HTML string
+
+    Args:
+        title: PDF title
+        subtitle: Subtitle shown in header
+        content_html: Main content HTML
+        template: Library template (defaults to workbook)
+    """
+    return get_renderer(template).render_html(title, subtitle, content_html, inline_css=True)
+
 
-def generate_pdf(title, subtitle, content_html, output_path):
+def generate_pdf(title, subtitle, content_html, output_path=None, thumbnails=None, linearize=False,
+                 template=None):
     """
     Generate a professional PDF from HTML content using REWIRED template
     
@@ -17,26 +454,64 @@ def generate_pdf(title, subtitle, content_html, output_path):
         title: PDF title
         subtitle: Subtitle shown in header
         content_html: Main content HTML
-        output_path: Where to save the PDF
+        output_path: Where to save the PDF: a file path, a writable binary
+            file object (streamed as it is produced), or None to get bytes
+        thumbnails: Optional thumbnail options, e.g. {'pages': (1,),
+            'widths': (400, 200), 'image_format': 'webp'}, to rasterize
+            pages of the rendered PDF (see pdf_thumbnails.py). They are
+            written next to output_path when it is a file path
+        linearize: Write a linearized ("fast web view") PDF, see
+            pdf_linearize.py
+        template: Library template: workbook (default), worksheet, handout
+            or manuscript (see template_library.py)
+
+    Returns:
+        output_path, or the PDF bytes when output_path is None; with
+        thumbnails, a (that, {thumbnail name: image bytes}) pair
     """
     
-    # Load template
-    template_path = os.path.join(os.path.dirname(__file__), 'rewired-template.html')
-    with open(template_path, 'r') as f:
-        template_content = f.read()
-    
-    # Render template with content
-    template = Template(template_content)
-    html_content = template.render(
-        title=title,
-        subtitle=subtitle,
-        content=content_html
-    )
-    
-    # Generate PDF
-    HTML(string=html_content).write_pdf(output_path)
-    print(f"✓ PDF generated: {output_path}")
-    return output_path
+    renderer = get_renderer(template)
+    images = None
+    if renderer.cache is not None or thumbnails is not None or linearize:
+        data, _, _ = renderer.cached_pdf(title, subtitle, content_html)
+        if thumbnails is not None:
+            images = renderer.thumbnails(title, subtitle, content_html, data, thumbnails)
+        if linearize:
+            from pdf_linearize import linearize_pdf
+            data = linearize_pdf(data)
+        if output_path is not None:
+            write_output(data, output_path)
+    elif output_path is None:
+        data, _ = renderer.pdf_bytes(title, subtitle, content_html)
+    else:
+        renderer.write_pdf(title, subtitle, content_html, output_path)
+
+    if isinstance(output_path, (str, os.PathLike)):
+        if images:
+            from pdf_thumbnails import write_thumbnails
+            write_thumbnails(images, output_path)
+        if renderer.deterministic:
+            from pdf_manifest import write_manifest
+            write_manifest(output_path)
+        print(f"✓ PDF generated: {output_path}")
+    result = data if output_path is None else output_path
+    return result if images is None else (result, images)
+
+
+def stream_pdf(title, subtitle, content_html, send, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Render a PDF and pass it to send() in chunks as it is written
+
+    Returns:
+        Total bytes sent
+    """
+    renderer = get_renderer()
+    with ChunkedWriter(send, chunk_size) as writer:
+        if renderer.cache is not None:
+            writer.write(renderer.cached_pdf(title, subtitle, content_html)[0])
+        else:
+            renderer.write_pdf(title, subtitle, content_html, writer)
+    return writer.bytes_written
 
 
 def generate_rewired_relief_toolkit():
@@ -215,9 +690,467 @@ def generate_rewired_relief_toolkit():
     return output_path
 
 
-if __name__ == "__main__":
+def read_markdown_source(source_path):
+    """
+    Read a Markdown product or lead magnet and convert it for the template
+
+    The first "# " heading becomes the title and a "## " heading directly
+    below it becomes the subtitle. Both stay in the body as well, the same
+    way the toolkit example repeats its title as an <h1>.
+
+    Returns:
+        (title, subtitle, content_html)
+    """
+    with open(source_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    title = os.path.splitext(os.path.basename(source_path))[0].replace('_', ' ').title()
+    subtitle = ''
+    headings = re.findall(r'^(#{1,2}) (.+?)\s*$', text, flags=re.MULTILINE)
+    if headings and headings[0][0] == '#':
+        title = headings[0][1]
+        if len(headings) > 1 and headings[1][0] == '##':
+            subtitle = headings[1][1]
+
+    content_html = convert_markdown(text)
+    return title, subtitle, content_html
+
+
+def discover_sources(root=REPO_ROOT, patterns=CATALOG_GLOBS):
+    """Find every Markdown source in the catalog, largest first"""
+    sources = []
+    for pattern in patterns:
+        sources.extend(glob.glob(os.path.join(root, pattern)))
+    # Largest documents first so a long render never ends up last in the queue
+    return sorted(set(sources), key=lambda path: (-os.path.getsize(path), path))
+
+
+def build_document(source_path, output_path, optimize=False, budget=None, thumbnails=None, linearize=False,
+                   engine='weasyprint', template=None):
+    """
+    Render one Markdown source to PDF (runs inside a batch worker process)
+
+    Args:
+        optimize: Shrink the PDF afterwards (see pdf_optimizer.py)
+        budget: Byte budget for the optimizer (implies optimize)
+        thumbnails: Thumbnail options (see generate_pdf()), written next
+            to the PDF
+        linearize: Linearize the final PDF and check its byte ranges (see
+            pdf_linearize.py)
+        engine: 'weasyprint', 'reportlab' or 'auto' (see pdf_engines.py)
+        template: Library template (defaults to workbook)
+
+    Returns:
+        dict with source, output, engine, pages, bytes, seconds and cached,
+        plus unoptimized_bytes, optimized_bytes and within_budget when
+        optimizing, thumbnails (their paths) when asked for, range_problems
+        when linearizing, etag in deterministic mode and memory (the
+        render's figures, see render_memory.py) under a memory budget
+    """
+    from pdf_engines import DocumentModel, record_timing, render_document
+
+    started = time.perf_counter()
+    title, subtitle, content_html = read_markdown_source(source_path)
+    document = DocumentModel(title, subtitle, content_html, template)
+    renderer = get_renderer(template)
+    renderer.last_memory = None
+    cached = False
+    result = {}
+    if engine == 'weasyprint' and renderer.cache is None and thumbnails is None:
+        render_started = time.perf_counter()
+        pages = len(renderer.write_pdf(title, subtitle, content_html, output_path).pages)
+        record_timing(engine, document, time.perf_counter() - render_started)
+    else:
+        rendered = render_document(document, engine, renderer.deterministic)
+        engine, data, pages, cached = rendered['engine'], rendered['data'], rendered['pages'], rendered['cached']
+        write_output(data, output_path)
+        if thumbnails is not None:
+            from pdf_thumbnails import make_thumbnails, write_thumbnails
+            if engine == 'weasyprint':
+                images = renderer.thumbnails(title, subtitle, content_html, data, thumbnails)
+            else:
+                images = make_thumbnails(data, **thumbnails)
+            result['thumbnails'] = write_thumbnails(images, output_path)
+
+    result.update(cached=cached, engine=engine)
+    if renderer.last_memory is not None:
+        result['memory'] = renderer.last_memory
+    if optimize or budget:
+        from pdf_optimizer import optimize_pdf
+        optimized = optimize_pdf(output_path, output_path, budget)
+        result.update(unoptimized_bytes=optimized['before'], optimized_bytes=optimized['after'],
+                      within_budget=optimized['within_budget'])
+    if linearize:
+        from pdf_linearize import check_ranges, linearize_pdf
+        _, result['range_problems'], _ = check_ranges(linearize_pdf(output_path, output_path))
+    if renderer.deterministic:
+        from pdf_manifest import write_manifest
+        result['etag'] = write_manifest(output_path)['etag']
+    result.update(source=source_path, output=output_path, pages=pages,
+                  bytes=os.path.getsize(output_path), seconds=time.perf_counter() - started)
+    return result
+
+
+def preview_document(source_path, output_path=None, template=None):
+    """
+    Write a Markdown source as the rendered template HTML, without the PDF engine
+
+    Args:
+        output_path: HTML path (defaults to next to the source), or a
+            writable text file object
+
+    Returns:
+        Where the HTML went
+    """
+    if output_path is None:
+        output_path = os.path.splitext(source_path)[0] + '.html'
+    html_content = render_html(*read_markdown_source(source_path), template=template)
+    if isinstance(output_path, (str, os.PathLike)):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+    else:
+        output_path.write(html_content)
+    return output_path
+
+
+def _init_batch_worker(metrics_target, cache_options=None, deterministic=False, memory_options=None):
+    if metrics_target:
+        from render_metrics import json_lines_sink
+        set_metrics_sink(json_lines_sink(metrics_target))
+    if cache_options is not None:
+        from render_cache import RenderCache
+        set_render_cache(RenderCache(**cache_options))
+    if deterministic:
+        set_deterministic()
+    if memory_options is not None:
+        set_memory_budget(**memory_options)
+
+
+def build_catalog(sources=None, out_dir=None, jobs=None, metrics_target=None, cache_options=None,
+                  optimize=False, budget=None, thumbnails=None, deterministic=False, linearize=False,
+                  engine='weasyprint', template=None, memory_options=None):
+    """
+    Render every catalog document across a process pool
+
+    Args:
+        sources: Markdown files to render (defaults to discover_sources())
+        out_dir: Directory for the PDFs (defaults to next to each source)
+        jobs: Worker processes (defaults to the number of CPU cores)
+        metrics_target: JSON lines file ('-' for stderr) that receives a
+            per-phase timing record for every document
+        cache_options: RenderCache keyword arguments (cache_dir, max_bytes)
+            to serve unchanged documents from the render cache
+        optimize: Shrink every PDF after rendering (see pdf_optimizer.py)
+        budget: Per-document byte budget for the optimizer
+        thumbnails: Thumbnail options (see generate_pdf()) to write cover
+            images next to every PDF
+        deterministic: Byte-stable PDFs with content hash / ETag sidecars
+        linearize: Linearize every PDF for fast web view
+        engine: 'weasyprint', 'reportlab' or 'auto' to pick per document
+            (see pdf_engines.py)
+        template: Library template for every document (defaults to workbook)
+        memory_options: set_memory_budget() keyword arguments (budget,
+            trace, max_drift) to hold every render to a memory budget. A
+            worker that aborts a render or drifts past max_drift is
+            recycled, by starting a fresh pool for the remaining documents
+
+    Returns:
+        List of result dicts from build_document(), plus an 'error' entry
+        for every document that failed
+    """
+    if sources is None:
+        sources = discover_sources()
+    jobs = jobs or os.cpu_count() or 1
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    # Workers import the precompiled templates instead of parsing them
+    ensure_compiled()
+
+    pending = list(reversed(sources))
+    results = []
+    while pending:
+        recycle = False
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending)),
+                                 initializer=_init_batch_worker,
+                                 initargs=(metrics_target, cache_options, deterministic, memory_options)) as pool:
+            futures = {}
+
+            def submit_next():
+                source_path = pending.pop()
+                stem = os.path.splitext(os.path.basename(source_path))[0]
+                output_path = os.path.join(out_dir or os.path.dirname(source_path), stem + '.pdf')
+                futures[pool.submit(build_document, source_path, output_path, optimize, budget,
+                                    thumbnails, linearize, engine, template)] = source_path
+
+            # Only as many documents in flight as workers, so a recycle can
+            # hand the rest to a fresh pool
+            while pending and len(futures) < jobs:
+                submit_next()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source_path = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'source': source_path, 'error': str(e)}
+                        recycle = recycle or isinstance(e, MemoryError)
+                    recycle = recycle or result.get('memory', {}).get('recycle', False)
+                    results.append(result)
+                    if pending and not recycle:
+                        submit_next()
+        if recycle and pending:
+            print(f"♻️  Worker memory drifted or a render hit its budget - "
+                  f"recycling workers for the remaining {len(pending)} document(s)")
+    return results
+
+
+def print_batch_summary(results, wall_seconds):
+    """Print a per-document summary of time, page count and bytes"""
+    print(f"\n📚 Batch summary ({len(results)} documents)")
+    for result in sorted(results, key=lambda r: r['source']):
+        source = os.path.relpath(result['source'], REPO_ROOT)
+        if 'error' in result:
+            print(f"   ✗ {source}: {result['error']}")
+            continue
+        print(f"   ✓ {source:<50} {result['pages']:>4} pages "
+              f"{result['bytes'] / 1024:>9.1f} KB {result['seconds']:>7.2f}s"
+              f"{'  (cached)' if result.get('cached') else ''}"
+              f"{'  ' + result['engine'] if result.get('engine', 'weasyprint') != 'weasyprint' else ''}"
+              f"{'  over budget' if result.get('within_budget') is False else ''}"
+              f"{'  range check: ' + '; '.join(result['range_problems']) if result.get('range_problems') else ''}")
+        if result.get('memory'):
+            from render_memory import format_stats
+            print(f"      memory: {format_stats(result['memory'])}")
+
+    rendered = [r for r in results if 'error' not in r]
+    busy = sum(r['seconds'] for r in rendered)
+    print(f"\n   Pages: {sum(r['pages'] for r in rendered)}  "
+          f"Bytes: {sum(r['bytes'] for r in rendered)}")
+    print(f"   Wall time: {wall_seconds:.2f}s  Render time: {busy:.2f}s  "
+          f"Speedup: {busy / wall_seconds if wall_seconds else 0:.1f}x")
+    optimized = [r for r in rendered if 'unoptimized_bytes' in r]
+    if optimized:
+        before = sum(r['unoptimized_bytes'] for r in optimized)
+        after = sum(r['optimized_bytes'] for r in optimized)
+        print(f"   Optimized: {before / 1024:.1f} KB -> {after / 1024:.1f} KB "
+              f"({(1 - after / before) * 100 if before else 0:.1f}% smaller)")
+    engines = sorted({r.get('engine', 'weasyprint') for r in rendered})
+    if rendered and engines != ['weasyprint']:
+        print("   Engines: " + ", ".join(f"{name} {sum(1 for r in rendered if r.get('engine') == name)}"
+                                         for name in engines))
+    measured = [r['memory'] for r in rendered if r.get('memory')]
+    if measured:
+        print(f"   Memory: largest render +{max(m['peak_kb'] for m in measured) / 1024:.0f} MB, "
+              f"highest steady state {max(m['rss_steady_kb'] for m in measured) / 1024:.0f} MB")
+    hits = sum(1 for r in rendered if r.get('cached'))
+    if hits:
+        print(f"   Cache: {hits} hits, {len(rendered) - hits} misses")
+
+
+def add_thumbnail_arguments(parser):
+    from pdf_thumbnails import parse_numbers
+    parser.add_argument('--thumbnails', type=parse_numbers, default=None, metavar='WIDTHS',
+                        help="Also write cover thumbnails at these pixel widths, e.g. 400,200")
+    parser.add_argument('--thumbnail-pages', type=parse_numbers, default=(1,), metavar='PAGES',
+                        help="Pages to thumbnail, from 1 (default: 1)")
+    parser.add_argument('--thumbnail-format', choices=('png', 'webp'), default='png')
+
+
+def add_engine_argument(parser):
+    parser.add_argument('--engine', choices=('weasyprint', 'reportlab', 'auto'), default='weasyprint',
+                        help="PDF engine; auto uses ReportLab for simple worksheet-style documents when it is "
+                             "faster (default: %(default)s)")
+
+
+def add_template_argument(parser):
+    parser.add_argument('--template', choices=template_names(), default=DEFAULT_TEMPLATE,
+                        help="Document type from templates/ (default: %(default)s)")
+
+
+def add_memory_arguments(parser, drift=True):
+    parser.add_argument('--memory-budget-mb', type=int, default=None,
+                        help="Abort a render that grows the worker by more than this (0 = only report memory)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also hold the Python heap to the budget, sampled with tracemalloc (slower)")
+    if drift:
+        parser.add_argument('--max-drift-mb', type=int, default=256,
+                            help="Recycle a worker once its steady-state memory has grown this much "
+                                 "since its first job (default: %(default)s)")
+
+
+def memory_options(args):
+    if args.memory_budget_mb is None:
+        return None
+    options = {'budget': args.memory_budget_mb * 1024 * 1024, 'trace': args.trace_memory}
+    if getattr(args, 'max_drift_mb', None) is not None:
+        options['max_drift'] = args.max_drift_mb * 1024 * 1024
+    return options
+
+
+def thumbnail_options(args):
+    if not args.thumbnails:
+        return None
+    return {'pages': args.thumbnail_pages, 'widths': args.thumbnails, 'image_format': args.thumbnail_format}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="REWIRED PDF generator")
+    subparsers = parser.add_subparsers(dest='command')
+
+    render = subparsers.add_parser('render', help="Render one Markdown source to PDF")
+    render.add_argument('source', help="Markdown file")
+    render.add_argument('-o', '--output', default=None, help="Where to save the PDF (default: next to the source)")
+    render.add_argument('--optimize', action='store_true', help="Shrink the PDF after rendering")
+    render.add_argument('--cache', action='store_true', help="Reuse the PDF if the document is unchanged")
+    add_thumbnail_arguments(render)
+    render.add_argument('--linearize', action='store_true', help="Linearize for fast web view (needs pikepdf)")
+    add_engine_argument(render)
+    add_template_argument(render)
+    add_memory_arguments(render, drift=False)
+    render.add_argument('--deterministic', action='store_true',
+                        help="Byte-stable output plus a .pdf.json sidecar with its hash and ETag")
+
+    preview = subparsers.add_parser('preview-html',
+                                    help="Write the rendered template as HTML, without loading the PDF engine")
+    preview.add_argument('source', help="Markdown file")
+    preview.add_argument('-o', '--output', default=None,
+                         help="Where to save the HTML (default: next to the source, '-' for stdout)")
+    add_template_argument(preview)
+
+    batch = subparsers.add_parser('batch', help="Render every products/*.md and lead_magnets/*.md")
+    batch.add_argument('sources', nargs='*', help="Markdown files (defaults to the whole catalog)")
+    batch.add_argument('-j', '--jobs', type=int, default=None, help="Worker processes (default: CPU cores)")
+    batch.add_argument('-o', '--out-dir', default=None, help="Output directory (default: next to each source)")
+    batch.add_argument('--metrics', default=None, metavar='FILE',
+                       help="Append per-phase timing records as JSON lines ('-' for stderr)")
+    batch.add_argument('--optimize', action='store_true', help="Shrink each PDF after rendering")
+    batch.add_argument('--budget-kb', type=int, default=None,
+                       help="Per-document size budget in KB for the optimizer (implies --optimize)")
+    batch.add_argument('--cache', action='store_true', help="Reuse PDFs for unchanged documents")
+    batch.add_argument('--cache-dir', default=None, help="Render cache directory (implies --cache)")
+    batch.add_argument('--cache-max-mb', type=int, default=512,
+                       help="Render cache size cap, least recently used PDFs are evicted (default: %(default)s)")
+    add_thumbnail_arguments(batch)
+    batch.add_argument('--linearize', action='store_true',
+                       help="Linearize each PDF for fast web view and check its byte ranges (needs pikepdf)")
+    add_engine_argument(batch)
+    add_template_argument(batch)
+    add_memory_arguments(batch)
+    batch.add_argument('--deterministic', action='store_true',
+                       help="Byte-stable output plus a .pdf.json sidecar with each PDF's hash and ETag")
+
+    book = subparsers.add_parser('manuscript', help="Render a whole manuscript in parallel chapter shards")
+    book.add_argument('source', help="Manuscript .txt or .md file")
+    book.add_argument('-o', '--output', required=True, help="Where to save the merged PDF")
+    book.add_argument('-j', '--jobs', type=int, default=None, help="Worker processes (default: CPU cores)")
+
+    watcher = subparsers.add_parser('watch', help="Rebuild affected PDFs whenever a source, the template or a font changes")
+    watcher.add_argument('-o', '--out-dir', default=None, help="Output directory (default: next to each source)")
+    watcher.add_argument('-j', '--jobs', type=int, default=None, help="Worker processes (default: CPU cores)")
+
+    serve = subparsers.add_parser('serve', help="Run the local render daemon (see render_daemon.py)")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--socket', default=None, help="Listen on a Unix socket instead of TCP")
+    serve.add_argument('-w', '--workers', type=int, default=None, help="Worker processes (default: CPU cores)")
+    serve.add_argument('--queue-size', type=int, default=16, help="Queued jobs before requests get a 429")
+    serve.add_argument('--job-timeout', type=float, default=60, help="Seconds before a render is killed")
+    serve.add_argument('--max-jobs', type=int, default=200, help="Recycle a worker after this many jobs (0 = never)")
+    add_memory_arguments(serve)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        from render_daemon import serve as run_daemon
+        run_daemon(args.host, args.port, args.socket, args.workers, args.queue_size,
+                   args.job_timeout, args.max_jobs, memory_options(args))
+        return 0
+
+    if args.command == 'preview-html':
+        started = time.perf_counter()
+        if args.output == '-':
+            preview_document(args.source, sys.stdout, args.template)
+        else:
+            output_path = preview_document(args.source, args.output, args.template)
+            print(f"✓ HTML preview: {output_path} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return 0
+
+    if getattr(args, 'thumbnails', None):
+        from pdf_thumbnails import MISSING_MESSAGE, thumbnails_available
+        if not thumbnails_available():
+            # Fail before rendering anything rather than on the first document
+            print(f"❌ --thumbnails: {MISSING_MESSAGE}")
+            return 1
+
+    if args.command != 'serve':
+        warn_missing_fonts()
+
+    if args.command == 'watch':
+        from render_watch import watch
+        watch(args.out_dir, args.jobs)
+        return 0
+
+    if args.command == 'render':
+        if args.cache:
+            from render_cache import RenderCache
+            set_render_cache(RenderCache())
+        if args.deterministic:
+            set_deterministic()
+        if args.memory_budget_mb is not None:
+            set_memory_budget(**memory_options(args))
+        output_path = args.output or os.path.splitext(args.source)[0] + '.pdf'
+        try:
+            result = build_document(args.source, output_path, args.optimize, thumbnails=thumbnail_options(args),
+                                    linearize=args.linearize, engine=args.engine, template=args.template)
+        except MemoryError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"✓ PDF generated: {output_path} ({result['engine']})")
+        print(f"   {result['pages']} pages, {result['bytes'] / 1024:.1f} KB in {result['seconds']:.2f}s"
+              f"{' (cached)' if result['cached'] else ''}{' ETag ' + result['etag'] if 'etag' in result else ''}")
+        if 'memory' in result:
+            from render_memory import format_stats
+            print(f"   Memory: {format_stats(result['memory'])}")
+        for path in result.get('thumbnails', []):
+            print(f"✓ Thumbnail: {path}")
+        for problem in result.get('range_problems', []):
+            print(f"⚠️  Range check: {problem}")
+        return 1 if result.get('range_problems') else 0
+
+    if args.command == 'manuscript':
+        from manuscript_pdf import build_manuscript
+        result = build_manuscript(args.source, args.output, args.jobs)
+        print(f"✓ PDF generated: {args.output}")
+        print(f"   {result['shards']} shards, {result['pages']} pages, "
+              f"{result['bytes'] / 1024:.1f} KB in {result['seconds']:.2f}s "
+              f"(peak worker RSS {result['worker_peak_rss_kb'] / 1024:.0f} MB)")
+        return 0
+
+    if args.command == 'batch':
+        started = time.perf_counter()
+        cache_options = None
+        if args.cache or args.cache_dir:
+            from render_cache import DEFAULT_CACHE_DIR
+            cache_options = {'cache_dir': args.cache_dir or DEFAULT_CACHE_DIR,
+                             'max_bytes': args.cache_max_mb * 1024 * 1024}
+        results = build_catalog(args.sources or None, args.out_dir, args.jobs, args.metrics, cache_options,
+                                args.optimize, args.budget_kb * 1024 if args.budget_kb else None,
+                                thumbnail_options(args), args.deterministic, args.linearize, args.engine,
+                                args.template, memory_options(args))
+        print_batch_summary(results, time.perf_counter() - started)
+        failed = any('error' in r or r.get('within_budget') is False or r.get('range_problems')
+                     for r in results)
+        return 1 if failed else 0
+
     # Generate the REWIRED Relief Toolkit as an example
     generate_rewired_relief_toolkit()
     print("\n✅ Professional PDF generated successfully!")
     print("📄 Location: /home/ubuntu/memoir-merge/client/public/rewired-relief-toolkit-professional.pdf")
     print("\n💡 To generate more PDFs, use the generate_pdf() function with your own content.")
+    print("💡 To rebuild every product and lead magnet, run: python3 generate_pdf.py batch")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Offset index and excerpt API for the manuscript
+
+manuscript/CrookedLines_FinalEdited.txt and "Final Manus Draft.md" have no
+Markdown headings, only lines like "PROLOGUE: ...", "PART I: ..." and
+"Chapter 12: ...". Scanning for them once gives a small index of byte
+offsets, one entry per section with the offsets of its scene breaks:
+
+    {"version": 1, "size": 390877, "mtime_ns": ..., "sections": [
+        ["front", null, "Front Matter", 0, 9440, []],
+        ["chapter", null, "PROLOGUE: The Liquor Store Parking Lot", 9440, 19684, [16726, 18775, 19681]],
+        ["part", "I", "PART I: FOUNDATIONS & FRACTURES", 19684, 19755, [19752]],
+        ["chapter", "1", "Chapter 1: The Oxygen Tent", 19755, 28473, [...]], ...]}
+
+The index is stored under .cache/manuscript/ and rebuilt automatically when
+the manuscript's size or mtime changes. Excerpts are sliced straight out of
+a memory-mapped file, so pulling three chapters never reads the rest.
+
+    python3 manuscript_index.py ../manuscript/CrookedLines_FinalEdited.txt
+    python3 manuscript_index.py ../manuscript/CrookedLines_FinalEdited.txt --excerpt prologue:2 -o excerpt.md
+"""
+
+from collections import namedtuple
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+
+INDEX_VERSION = 1
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'manuscript')
+
+# "Chapter 12: THE LONG ISLAND ICED TEA", "CHAPTER 6: ...", "PART IV: ROCK BOTTOM",
+# "PROLOGUE: The Liquor Store Parking Lot", "EPILOGUE: One Day at a Time"
+HEADING_RE = re.compile(
+    rb'^[ \t]*(?:(?P<kind>chapter|part)[ \t]+(?P<number>[0-9]+|[ivxlc]+)|(?P<special>prologue|epilogue|afterword))'
+    rb'[ \t]*:[^\r\n]{0,120}?[ \t]*\r?$',
+    re.IGNORECASE | re.MULTILINE)
+
+SCENE_BREAK_RE = re.compile(rb'^[ \t]*\\?(?:---|\*[ \t]*\*[ \t]*\*|\xe2\x81\x82)[ \t]*\r?$', re.MULTILINE)
+
+Section = namedtuple('Section', ['index', 'kind', 'number', 'title', 'start', 'end', 'scenes'])
+
+
+def clean_heading(raw):
+    """Turn a raw heading line into outline text"""
+    return raw.decode('utf-8', errors='replace').replace('\\', '').strip(' \t\r*')
+
+
+def scan(data):
+    """
+    Find section and scene boundaries in a bytes-like object (bytes or mmap)
+
+    Returns:
+        List of [kind, number, title, start, end, scene offsets] covering the
+        whole file in order, starting with the front matter
+    """
+    sections = []
+    start, kind, number, title = 0, 'front', None, 'Front Matter'
+    for match in HEADING_RE.finditer(data):
+        if match.start() > start:
+            sections.append([kind, number, title, start, match.start(), []])
+        start = match.start()
+        if match.group('special'):
+            kind, number = 'chapter', None
+        else:
+            kind = match.group('kind').decode('ascii').lower()
+            number = match.group('number').decode('ascii').upper()
+        title = clean_heading(match.group(0))
+    sections.append([kind, number, title, start, len(data), []])
+
+    position = 0
+    for match in SCENE_BREAK_RE.finditer(data):
+        while sections[position][4] <= match.start():
+            position += 1
+        sections[position][5].append(match.end())
+    return sections
+
+
+def index_path_for(source_path, index_dir=DEFAULT_INDEX_DIR):
+    source_path = os.path.abspath(source_path)
+    digest = hashlib.sha256(source_path.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(index_dir, f"{os.path.basename(source_path)}.{digest}.json")
+
+
+def build_index(source_path, index_dir=DEFAULT_INDEX_DIR):
+    """Scan the manuscript once (memory-mapped) and write its offset index"""
+    stat = os.stat(source_path)
+    with open(source_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        sections = scan(data)
+    index = {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+             'sections': sections}
+
+    if index_dir:
+        path = index_path_for(source_path, index_dir)
+        os.makedirs(index_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    return index
+
+
+def load_index(source_path, index_dir=DEFAULT_INDEX_DIR):
+    """Return the manuscript's index, rebuilding it if the file changed"""
+    stat = os.stat(source_path)
+    if index_dir:
+        try:
+            with open(index_path_for(source_path, index_dir), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if (index.get('version') == INDEX_VERSION and index['size'] == stat.st_size
+                    and index['mtime_ns'] == stat.st_mtime_ns):
+                return index
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+    return build_index(source_path, index_dir)
+
+
+class Manuscript:
+    """
+    A manuscript file with its section index, read through mmap
+
+    Args:
+        source_path: Manuscript .txt or .md file
+        index_dir: Where the offset index is kept (None = don't store it)
+    """
+
+    def __init__(self, source_path, index_dir=DEFAULT_INDEX_DIR):
+        self.source_path = source_path
+        self.sections = [Section(i, *entry) for i, entry in enumerate(load_index(source_path, index_dir)['sections'])]
+        self._file = None
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    @property
+    def data(self):
+        if self._map is None:
+            self._file = open(self.source_path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def chapters(self):
+        return [section for section in self.sections if section.kind == 'chapter']
+
+    def find(self, name):
+        """
+        Look a section up by "3", "chapter 3", "part iv", "prologue" or "epilogue"
+
+        Raises:
+            KeyError: No section matches
+        """
+        name = name.strip().lower()
+        kind, _, number = name.rpartition(' ')
+        for section in self.sections:
+            if section.number is None:
+                if section.title.lower().startswith(name):
+                    return section
+            elif section.number.lower() == number and section.kind == (kind or 'chapter'):
+                return section
+        raise KeyError(f"No section {name!r} in {self.source_path}")
+
+    def read(self, start, end):
+        return self.data[start:end].decode('utf-8-sig', errors='replace')
+
+    def excerpt(self, first, last=None):
+        """Raw text from the start of section first to the end of section last (inclusive)"""
+        first = self.find(first) if isinstance(first, str) else first
+        last = first if last is None else (self.find(last) if isinstance(last, str) else last)
+        return self.read(first.start, last.end)
+
+    def excerpt_markdown(self, first, last=None):
+        """
+        An excerpt as Markdown for the lead magnet pipeline: headings become
+        "## " headings, lines become paragraphs, scene breaks become rules
+        """
+        first = self.find(first) if isinstance(first, str) else first
+        last = first if last is None else (self.find(last) if isinstance(last, str) else last)
+        blocks = []
+        for section in self.sections[first.index:last.index + 1]:
+            lines = self.read(section.start, section.end).splitlines()
+            if section.kind != 'front' and lines:
+                lines.pop(0)
+                blocks.append(f"## {section.title}")
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                blocks.append('---' if SCENE_BREAK_RE.match(line.encode('utf-8')) else line)
+        return '\n\n'.join(blocks) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index a manuscript and pull excerpts from it")
+    parser.add_argument('source', help="Manuscript .txt or .md file")
+    parser.add_argument('--excerpt', default=None, metavar='FIRST[:LAST]',
+                        help='Sections to extract, e.g. "prologue:2" or "part i:chapter 5"')
+    parser.add_argument('-o', '--output', default=None, help="Write the excerpt as Markdown here (default: stdout)")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the index even if it is current")
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        build_index(args.source)
+
+    with Manuscript(args.source) as manuscript:
+        if not args.excerpt:
+            for section in manuscript.sections:
+                indent = '   ' if section.kind == 'chapter' else ''
+                print(f"{indent}{section.title:<60} {section.start:>9} {section.end - section.start:>8} bytes "
+                      f"{len(section.scenes):>3} scenes")
+            return 0
+
+        first, _, last = args.excerpt.partition(':')
+        try:
+            text = manuscript.excerpt_markdown(first, last or None)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"✓ Excerpt written: {args.output}")
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
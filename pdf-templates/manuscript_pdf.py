@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Chapter-sharded rendering for manuscript-scale documents
+
+Rendering a whole book (manuscript/CrookedLines_FinalEdited.txt or
+"Final Manus Draft.md") as one content_html string builds a single huge
+layout tree. Instead the source is split at its "PROLOGUE: ...", "PART I: ..."
+and "Chapter 1: ..." headings (from manuscript_index.py's offset index), each
+shard is rendered in its own worker process straight from its byte range in
+the file, and the shard PDFs are stitched together afterwards:
+
+- "Page X of Y" footers are stamped across the merged document, since
+  each shard only knows its own page count
+- the outline has one entry per part with its chapters nested underneath
+
+Peak memory per worker is bounded by the largest shard, not the book.
+
+Run with: python3 generate_pdf.py manuscript ../manuscript/CrookedLines_FinalEdited.txt -o book.pdf
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
+import html
+import io
+import os
+import re
+import resource
+import tempfile
+import time
+
+import markdown
+
+from manuscript_index import clean_heading, load_index
+
+# Markdown reference definitions, e.g. the cover image at the end of the draft
+REFERENCE_RE = re.compile(rb'^\[(?P<id>[^\]]+)\]:[^\r\n]*\r?$', re.MULTILINE)
+
+SCENE_BREAK_RE = re.compile(r'^[ \t]*\\?(?:---|\*\s*\*\s*\*|⁂)[ \t]*$', re.MULTILINE)
+
+FOOTER_TEXT = "© 2025 Shaun Critzer | shauncritzer.com | Page {page} of {pages}"
+
+# Shards are separate documents, so per-shard headers, footers and page
+# counters are switched off and the real footer is stamped after merging
+Shard = namedtuple('Shard', ['index', 'kind', 'title', 'start', 'end'])
+
+
+def split_manuscript(source_path):
+    """
+    Find the shard boundaries of a manuscript
+
+    Returns:
+        List of Shard tuples covering the whole file in order: the front
+        matter, then one shard per part heading and per chapter (the
+        prologue and epilogue count as chapters)
+    """
+    return [Shard(index, kind, title, start, end)
+            for index, (kind, _, title, start, end, _) in enumerate(load_index(source_path)['sections'])]
+
+
+def find_references(source_path):
+    """Byte ranges of Markdown reference definitions, keyed by id"""
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    return {m.group('id').decode('utf-8'): (m.start(), m.end()) for m in REFERENCE_RE.finditer(data)}
+
+
+def read_range(source_path, start, end):
+    with open(source_path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start).decode('utf-8-sig', errors='replace')
+
+
+def text_to_html(text, kind):
+    """Plain text manuscript: one paragraph per line, first line is the heading"""
+    lines = [line.strip() for line in text.splitlines()]
+    parts = []
+    if kind != 'front' and lines:
+        css_class = 'part-title' if kind == 'part' else 'chapter-title'
+        parts.append(f'<h1 class="{css_class}">{html.escape(lines.pop(0))}</h1>')
+    for line in lines:
+        if not line:
+            continue
+        if SCENE_BREAK_RE.match(line):
+            parts.append('<p class="scene-break">* * *</p>')
+        elif len(line) > 2 and line.startswith('*') and line.endswith('*'):
+            parts.append(f'<p><em>{html.escape(line.strip("*"))}</em></p>')
+        else:
+            parts.append(f'<p>{html.escape(line)}</p>')
+    return '\n'.join(parts)
+
+
+def markdown_to_html(text, kind, references):
+    """Markdown manuscript: promote the heading line and render the rest"""
+    heading = ''
+    if kind != 'front':
+        first, _, text = text.partition('\n')
+        css_class = 'part-title' if kind == 'part' else 'chapter-title'
+        heading = f'<h1 class="{css_class}">{html.escape(clean_heading(first.encode("utf-8")))}</h1>\n'
+    text = SCENE_BREAK_RE.sub('<p class="scene-break">* * *</p>', text)
+    return heading + markdown.markdown(text + '\n\n' + references)
+
+
+def render_shard(source_path, shard, output_path, references=()):
+    """
+    Render one shard to its own PDF (runs inside a worker process)
+
+    Args:
+        references: Byte ranges of Markdown reference definitions the
+            shard uses but doesn't contain
+
+    Returns:
+        (shard index, page count, worker peak RSS in KB)
+    """
+    from generate_pdf import get_renderer
+
+    renderer = get_renderer('manuscript')
+
+    text = read_range(source_path, shard.start, shard.end)
+    if source_path.endswith('.md'):
+        definitions = '\n'.join(read_range(source_path, start, end) for start, end in references)
+        content_html = markdown_to_html(text, shard.kind, definitions)
+    else:
+        content_html = text_to_html(text, shard.kind)
+
+    document = renderer.write_pdf(shard.title, '', content_html, output_path)
+    return shard.index, len(document.pages), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def footer_overlay(page_sizes):
+    """One footer-only page per document page, as a PDF in memory"""
+    from reportlab.lib.colors import HexColor
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    overlay = canvas.Canvas(buffer)
+    for number, (width, height) in enumerate(page_sizes, start=1):
+        overlay.setPageSize((width, height))
+        overlay.setFont('Helvetica', 9)
+        overlay.setFillColor(HexColor('#6b7280'))
+        # Middle of the template's 0.75in bottom margin
+        overlay.drawCentredString(width / 2, 0.375 * 72,
+                                  FOOTER_TEXT.format(page=number, pages=len(page_sizes)))
+        overlay.showPage()
+    overlay.save()
+    buffer.seek(0)
+    return buffer
+
+
+def stitch_shards(shards, shard_paths, output_path):
+    """Merge the shard PDFs, stamp continuous footers and build the outline"""
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    first_pages = []
+    for shard in shards:
+        first_pages.append(len(writer.pages))
+        writer.append(shard_paths[shard.index], import_outline=False)
+
+    sizes = [(float(page.mediabox.width), float(page.mediabox.height)) for page in writer.pages]
+    footers = PdfReader(footer_overlay(sizes))
+    for page, footer in zip(writer.pages, footers.pages):
+        page.merge_page(footer)
+
+    part = None
+    for shard, first_page in zip(shards, first_pages):
+        if shard.kind == 'part':
+            part = writer.add_outline_item(shard.title, first_page)
+        else:
+            writer.add_outline_item(shard.title, first_page, parent=part if shard.kind == 'chapter' else None)
+
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+    return len(sizes)
+
+
+def build_manuscript(source_path, output_path, jobs=None):
+    """
+    Render a manuscript as chapter shards in parallel and stitch them into one PDF
+
+    Args:
+        source_path: Manuscript .txt or .md file
+        output_path: Where to save the merged PDF
+        jobs: Worker processes (defaults to the number of CPU cores)
+
+    Returns:
+        dict with shards, pages, bytes, seconds and worker_peak_rss_kb
+    """
+    started = time.perf_counter()
+    shards = split_manuscript(source_path)
+    references = find_references(source_path) if source_path.endswith('.md') else {}
+
+    with tempfile.TemporaryDirectory(prefix='manuscript-shards-') as tmp_dir:
+        shard_paths = {}
+        peak_rss = 0
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            futures = []
+            # Longest shards first so the pool isn't left waiting on one at the end
+            for shard in sorted(shards, key=lambda s: s.start - s.end):
+                text = read_range(source_path, shard.start, shard.end)
+                used = [references[ref_id] for ref_id in references
+                        if f'][{ref_id}]' in text and not shard.start <= references[ref_id][0] < shard.end]
+                shard_paths[shard.index] = os.path.join(tmp_dir, f'shard-{shard.index:04d}.pdf')
+                futures.append(pool.submit(render_shard, source_path, shard,
+                                           shard_paths[shard.index], used))
+            for future in futures:
+                _, _, rss = future.result()
+                peak_rss = max(peak_rss, rss)
+
+        pages = stitch_shards(shards, shard_paths, output_path)
+
+    return {
+        'shards': len(shards),
+        'pages': pages,
+        'bytes': os.path.getsize(output_path),
+        'seconds': time.perf_counter() - started,
+        'worker_peak_rss_kb': peak_rss,
+    }
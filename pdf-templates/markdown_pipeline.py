@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Markdown front end for the REWIRED template
+
+Converts the Markdown sources in products/ and lead_magnets/ into HTML that
+uses the template's pre-styled components:
+
+- runs of checkbox lines ("□ ...", "☐ ...", "- [ ] ...")  -> <ul class="checklist">
+- "### Exercise ...", "### Daily Practice ..." and similar -> <div class="exercise-box">
+- "> **Did You Know?**" style callouts                     -> tip-box / highlight-box / section-box
+
+Documents are converted one section (a "#" or "##" heading and everything
+up to the next one) at a time, and each section's HTML is cached by a hash
+of its Markdown, in memory (the most recently used sections) and on disk.
+Editing one worksheet only re-converts that worksheet's section.
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+import re
+
+import markdown
+
+# Bump whenever the conversion rules below change, so cached HTML is dropped
+CONVERTER_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'markdown')
+
+# Converted sections kept in memory per process (the rest are re-read from disk)
+MEMORY_CACHE_SIZE = 512
+
+SECTION_HEADING_RE = re.compile(r'^#{1,2} ')
+HEADING_RE = re.compile(r'^(#{1,6}) (.*?)\s*$')
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+CHECKBOX_RE = re.compile(r'^\s*(?:[-*]\s+)?(?:□|☐|\[ \])\s+')
+CHECKBOX_SPLIT_RE = re.compile(r'\s*(?:□|☐)\s+')
+CALLOUT_LABEL_RE = re.compile(r'^\*\*(?P<label>[^*]+?)\*\*')
+LIST_ITEM_RE = re.compile(r'^\s*(?:[-*+]|\d+\.)\s+')
+
+# Sub-headings whose content is an activity for the reader
+EXERCISE_PREFIXES = ('Exercise', 'Daily Practice', 'Practice', 'Worksheet', 'Activity')
+
+# Bold label at the start of a blockquote -> template component
+CALLOUT_CLASSES = {
+    'did you know': 'tip-box',
+    'tip': 'tip-box',
+    'key insight': 'section-box',
+    'remember': 'highlight-box',
+    'important': 'highlight-box',
+    'note': 'highlight-box',
+    'warning': 'highlight-box',
+}
+
+EXTENSIONS = ['tables', 'sane_lists', 'md_in_html', 'fenced_code']
+
+
+def split_sections(text):
+    """Split a Markdown document before every "#" and "##" heading"""
+    sections = []
+    current = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        if not in_fence and SECTION_HEADING_RE.match(line) and current:
+            sections.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append(''.join(current))
+    return sections
+
+
+def callout_class(first_line):
+    match = CALLOUT_LABEL_RE.match(first_line.strip())
+    if not match:
+        return None
+    label = match.group('label').strip().rstrip(':?!').lower()
+    return CALLOUT_CLASSES.get(label)
+
+
+class MarkdownConverter:
+    """
+    Section-cached Markdown -> template HTML converter
+
+    Args:
+        cache_dir: Where converted sections are stored (None = memory only)
+        memory_size: Sections kept in memory, least recently used dropped first
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, memory_size=MEMORY_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+        self._md = markdown.Markdown(extensions=EXTENSIONS)
+
+    def section_key(self, section):
+        digest = hashlib.sha256()
+        digest.update(f"{CONVERTER_VERSION}:{markdown.__version__}\n".encode('utf-8'))
+        digest.update(section.encode('utf-8'))
+        return digest.hexdigest()
+
+    def convert(self, text):
+        """Convert a whole document, re-using cached sections"""
+        return '\n'.join(self.convert_section(section) for section in split_sections(text))
+
+    def convert_section(self, section):
+        key = self.section_key(section)
+        if key in self.memory:
+            self.stats['hits'] += 1
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        cache_path = os.path.join(self.cache_dir, key[:2], key + '.html') if self.cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                html = f.read()
+            self.stats['hits'] += 1
+        else:
+            html = self.render_section(section)
+            self.stats['misses'] += 1
+            if cache_path:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                os.replace(tmp_path, cache_path)
+
+        self.memory[key] = html
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+        return html
+
+    def render_section(self, section):
+        """Map one section onto the template's components and render it"""
+        lines = self.wrap_exercises(self.replace_blocks(self.separate_lists(section.splitlines())))
+        self._md.reset()
+        return self._md.convert('\n'.join(lines))
+
+    def inline(self, text):
+        """Render a single line of Markdown without the surrounding <p>"""
+        self._md.reset()
+        html = self._md.convert(text.strip())
+        if html.startswith('<p>') and html.endswith('</p>'):
+            html = html[3:-4]
+        return html
+
+    def separate_lists(self, lines):
+        """Add the blank line Markdown needs before a list that follows a paragraph"""
+        output = []
+        for line in lines:
+            previous = output[-1] if output else ''
+            if (LIST_ITEM_RE.match(line) and previous.strip() and not LIST_ITEM_RE.match(previous)
+                    and not previous.startswith(('>', '|', '    ', '\t'))):
+                output.append('')
+            output.append(line)
+        return output
+
+    def replace_blocks(self, lines):
+        """Turn checkbox runs into checklists and labelled blockquotes into callouts"""
+        output = []
+        in_fence = False
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+
+            # Code blocks are passed through untouched
+            if FENCE_RE.match(line):
+                in_fence = not in_fence
+            if in_fence or FENCE_RE.match(line):
+                output.append(line)
+                i += 1
+                continue
+
+            if CHECKBOX_RE.match(line):
+                items = []
+                while i < len(lines) and CHECKBOX_RE.match(lines[i]):
+                    text = CHECKBOX_RE.sub('', lines[i], count=1)
+                    # "☐ Anger  ☐ Loneliness  ☐ Stress" on one line is several items
+                    items.extend(part for part in CHECKBOX_SPLIT_RE.split(text) if part.strip())
+                    i += 1
+                output.append('')
+                output.append('<ul class="checklist">')
+                output.extend(f'<li>{self.inline(item)}</li>' for item in items)
+                output.append('</ul>')
+                output.append('')
+                continue
+
+            if line.startswith('>') and callout_class(line.lstrip('> ')):
+                css_class = callout_class(line.lstrip('> '))
+                body = []
+                while i < len(lines) and lines[i].startswith('>'):
+                    body.append(lines[i][1:].lstrip(' ') if len(lines[i]) > 1 else '')
+                    i += 1
+                output.extend(['', f'<div class="{css_class}" markdown="1">', ''])
+                output.extend(self.replace_blocks(body))
+                output.extend(['', '</div>', ''])
+                continue
+
+            output.append(line)
+            i += 1
+        return output
+
+    def wrap_exercises(self, lines):
+        """Put "### Exercise ..." style sub-sections inside an exercise-box"""
+        output = []
+        open_box = False
+        in_fence = False
+        for line in lines:
+            if FENCE_RE.match(line):
+                in_fence = not in_fence
+                output.append(line)
+                continue
+            if in_fence:
+                output.append(line)
+                continue
+            heading = HEADING_RE.match(line)
+            ends_box = (heading and len(heading.group(1)) <= 3) or line.strip() == '---'
+            if open_box and ends_box:
+                output.extend(['', '</div>', ''])
+                open_box = False
+            if heading and len(heading.group(1)) == 3 and heading.group(2).startswith(EXERCISE_PREFIXES):
+                output.extend(['', '<div class="exercise-box" markdown="1">', '',
+                               f'#### {heading.group(2)}', ''])
+                open_box = True
+                continue
+            output.append(line)
+        if open_box:
+            output.extend(['', '</div>', ''])
+        return output
+
+
+_converter = None
+
+
+def get_converter():
+    """Return this process's shared MarkdownConverter"""
+    global _converter
+    if _converter is None:
+        _converter = MarkdownConverter()
+    return _converter
+
+
+def convert_markdown(text):
+    """Convert a Markdown document to template HTML (section-cached)"""
+    return get_converter().convert(text)
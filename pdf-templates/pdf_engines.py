@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+"""
+One document model for both PDF engines, with automatic engine selection
+
+The catalog's Markdown converts to a small set of HTML elements (headings,
+paragraphs, lists, checklists, tables, rules and the template's
+exercise/tip/section/highlight boxes). DocumentModel parses that HTML into
+blocks once, and each engine renders the same model:
+
+    weasyprint   the HTML template library, full CSS layout (PdfRenderer)
+    reportlab    the blocks as ReportLab flowables styled after the template,
+                 far cheaper for worksheet-style pages
+
+A document that uses anything ReportLab can't reproduce (images, inline
+styles, unknown classes or tags, a template other than workbook, text the
+base-14 fonts have no glyphs for) always goes to WeasyPrint. For the rest,
+"auto" compares the recorded seconds per block of both engines (every render
+through build_document() appends one to .cache/engine-timings.jsonl) and
+picks the faster one; without timings for ReportLab yet it tries ReportLab.
+
+    python3 generate_pdf.py batch --engine auto
+    python3 pdf_engines.py ../products/*.md      # show each document's features and the engine auto picks
+"""
+
+from collections import namedtuple
+from html.parser import HTMLParser
+from xml.sax.saxutils import escape
+import argparse
+import fcntl
+import glob
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+ENGINES = ('weasyprint', 'reportlab')
+
+DEFAULT_TIMINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'engine-timings.jsonl')
+
+# Timings kept per engine when the file is compacted, and the size that triggers it
+TIMINGS_KEPT = 200
+TIMINGS_COMPACT_BYTES = 256 * 1024
+
+FOOTER_TEXT = "© 2025 Shaun Critzer | shauncritzer.com | Page {page} of {pages}"
+
+# Elements the ReportLab engine reproduces; anything else forces WeasyPrint
+BLOCK_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol', 'li', 'table', 'thead', 'tbody',
+              'tr', 'th', 'td', 'hr', 'div', 'blockquote'}
+INLINE_TAGS = {'strong', 'b', 'em', 'i', 'code', 'br', 'a'}
+BOX_CLASSES = {'exercise-box', 'tip-box', 'section-box', 'highlight-box'}
+SUPPORTED_CLASSES = BOX_CLASSES | {'checklist', 'page-break'}
+
+# Library templates the ReportLab styles reproduce (None = the default)
+REPORTLAB_TEMPLATES = {None, 'workbook'}
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+# The ReportLab engine draws with the base-14 fonts, which only cover WinAnsi
+GLYPH_ENCODING = 'cp1252'
+
+# Characters of a missing-glyph note listed before it is cut short
+MISSING_GLYPHS_SHOWN = 5
+
+
+def missing_glyphs(text):
+    """Characters of text the base-14 fonts can't draw"""
+    try:
+        text.encode(GLYPH_ENCODING)
+        return set()
+    except UnicodeEncodeError:
+        return {char for char in text if not char.isspace() and char.encode(GLYPH_ENCODING, 'ignore') == b''}
+
+Block = namedtuple('Block', ['kind', 'text', 'level', 'css_class', 'children', 'rows'],
+                   defaults=('', 0, None, (), ()))
+
+
+class Element:
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.children = []
+
+
+class _TreeBuilder(HTMLParser):
+    """Minimal DOM for the converter's HTML (void elements are closed right away)"""
+
+    VOID = {'br', 'hr', 'img', 'input', 'meta', 'link', 'col'}
+
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.root = Element('root', ())
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, attrs)
+        self.stack[-1].children.append(element)
+        if tag not in self.VOID:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.stack[-1].children.append(Element(tag, attrs))
+
+    def handle_endtag(self, tag):
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+class _BlockBuilder:
+    """Turns the DOM into Blocks, noting every feature the document uses"""
+
+    def __init__(self):
+        self.features = set()
+        self.unsupported = set()
+        self.missing_glyphs = set()
+
+    def note(self, element):
+        self.features.add(element.tag)
+        if element.tag not in BLOCK_TAGS and element.tag not in INLINE_TAGS:
+            self.unsupported.add(element.tag)
+        if 'style' in element.attrs:
+            self.unsupported.add(f"{element.tag}[style]")
+        for css_class in element.attrs.get('class', '').split():
+            self.features.add(f".{css_class}")
+            if css_class not in SUPPORTED_CLASSES:
+                self.unsupported.add(f".{css_class}")
+
+    def inline(self, nodes):
+        """ReportLab paragraph markup for a run of inline nodes"""
+        parts = []
+        for node in nodes:
+            if isinstance(node, str):
+                self.missing_glyphs |= missing_glyphs(node)
+                parts.append(escape(WHITESPACE_RE.sub(' ', node)))
+                continue
+            self.note(node)
+            inner = self.inline(node.children)
+            if node.tag in ('strong', 'b'):
+                parts.append(f'<font color="#0f766e"><b>{inner}</b></font>')
+            elif node.tag in ('em', 'i'):
+                parts.append(f'<font color="#4b5563"><i>{inner}</i></font>')
+            elif node.tag == 'code':
+                parts.append(f'<font face="Courier" size="10">{inner}</font>')
+            elif node.tag == 'br':
+                parts.append('<br/>')
+            elif node.tag == 'a':
+                parts.append(f'<a href="{escape(node.attrs.get("href", ""))}">{inner}</a>')
+            else:
+                if node.tag in BLOCK_TAGS:
+                    self.unsupported.add(f"{node.tag} inside text")
+                parts.append(inner)
+        return ''.join(parts).strip()
+
+    def blocks(self, nodes):
+        blocks = []
+        run = []
+
+        def flush():
+            text = self.inline(run)
+            if text:
+                blocks.append(Block('paragraph', text))
+            run.clear()
+
+        for node in nodes:
+            if isinstance(node, str) or node.tag in INLINE_TAGS or node.tag not in BLOCK_TAGS:
+                run.append(node)
+                continue
+            flush()
+            self.note(node)
+            blocks.extend(self.block(node))
+        flush()
+        return blocks
+
+    def block(self, element):
+        tag = element.tag
+        css_class = element.attrs.get('class', '').split()
+        if tag[0] == 'h' and tag[1:].isdigit():
+            return [Block('heading', self.inline(element.children), level=int(tag[1]))]
+        if tag == 'p':
+            text = self.inline(element.children)
+            return [Block('paragraph', text)] if text else []
+        if tag == 'hr':
+            return [Block('rule')]
+        if tag in ('ul', 'ol'):
+            items = []
+            for child in element.children:
+                if isinstance(child, str):
+                    continue
+                self.note(child)
+                items.append(Block('item', children=tuple(self.blocks(child.children))))
+            kind = 'checklist' if 'checklist' in css_class else tag
+            return [Block('list', css_class=kind, children=tuple(items))]
+        if tag == 'table':
+            return [Block('table', rows=tuple(self.table_rows(element)))]
+        if tag == 'blockquote':
+            return [Block('quote', children=tuple(self.blocks(element.children)))]
+        if tag == 'div':
+            if 'page-break' in css_class:
+                return [Block('page_break')]
+            box = next((c for c in css_class if c in BOX_CLASSES), None)
+            children = tuple(self.blocks(element.children))
+            return [Block('box', css_class=box, children=children)] if box else list(children)
+        # A stray li/tr/td outside its parent: keep the text
+        return self.blocks(element.children)
+
+    def table_rows(self, element):
+        rows = []
+        for child in element.children:
+            if isinstance(child, str):
+                continue
+            self.note(child)
+            if child.tag in ('thead', 'tbody'):
+                rows.extend(self.table_rows(child))
+            elif child.tag == 'tr':
+                cells = [c for c in child.children if not isinstance(c, str)]
+                for cell in cells:
+                    self.note(cell)
+                rows.append((any(c.tag == 'th' for c in cells), [self.inline(c.children) for c in cells]))
+        return rows
+
+
+class DocumentModel:
+    """
+    A catalog document as engine-neutral blocks
+
+    Args:
+        title, subtitle, content_html, template: As passed to generate_pdf()
+    """
+
+    def __init__(self, title, subtitle, content_html, template=None):
+        self.title = title
+        self.subtitle = subtitle
+        self.content_html = content_html
+        self.template = template
+        tree = _TreeBuilder()
+        tree.feed(content_html)
+        tree.close()
+        builder = _BlockBuilder()
+        self.blocks = builder.blocks(tree.root.children)
+        self.features = builder.features
+        self.unsupported = builder.unsupported
+        missing = builder.missing_glyphs | missing_glyphs(subtitle or '')
+        if missing:
+            shown = ' '.join(sorted(missing)[:MISSING_GLYPHS_SHOWN])
+            more = ' ...' if len(missing) > MISSING_GLYPHS_SHOWN else ''
+            self.unsupported.add(f"characters outside WinAnsi ({shown}{more})")
+        if template not in REPORTLAB_TEMPLATES:
+            self.unsupported.add(f"the {template} template")
+
+    @classmethod
+    def from_markdown(cls, source_path, template=None):
+        from generate_pdf import read_markdown_source
+        return cls(*read_markdown_source(source_path), template=template)
+
+    def size(self):
+        """Block count (nested blocks included), the unit timings are recorded in"""
+        def count(blocks):
+            return sum(1 + count(block.children) + len(block.rows) for block in blocks)
+        return count(self.blocks) or 1
+
+
+class WeasyPrintEngine:
+    """The document's library template through this process's PdfRenderer"""
+
+    name = 'weasyprint'
+
+    def supports(self, document):
+        return True
+
+    def render(self, document, deterministic=False):
+        """
+        Args:
+            deterministic: Pin the document date to SOURCE_DATE_EPOCH and
+                derive the file ID from the inputs (see pdf_manifest.py)
+
+        Returns:
+            (PDF bytes, page count, whether it came from the render cache)
+        """
+        from generate_pdf import get_renderer
+        renderer = get_renderer(document.template, deterministic=deterministic)
+        return renderer.cached_pdf(document.title, document.subtitle, document.content_html)
+
+
+class ReportLabEngine:
+    """The blocks as ReportLab flowables, styled after the workbook template"""
+
+    name = 'reportlab'
+
+    def __init__(self):
+        self._styles = None
+
+    def supports(self, document):
+        return not document.unsupported
+
+    def styles(self):
+        if self._styles is None:
+            from reportlab.lib import colors
+            from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+            from reportlab.lib.styles import ParagraphStyle
+
+            body = ParagraphStyle('RewiredBody', fontName='Helvetica', fontSize=11, leading=17.6,
+                                  textColor=colors.HexColor('#1f2937'), alignment=TA_JUSTIFY, spaceAfter=11)
+            heading = ParagraphStyle('RewiredHeading', parent=body, fontName='Times-Bold', alignment=0,
+                                     keepWithNext=1)
+            self._styles = {
+                'body': body,
+                'item': ParagraphStyle('RewiredItem', parent=body, spaceAfter=5),
+                'cell': ParagraphStyle('RewiredCell', parent=body, alignment=0, spaceAfter=0),
+                'th': ParagraphStyle('RewiredTh', parent=body, alignment=0, spaceAfter=0,
+                                     fontName='Helvetica-Bold', textColor=colors.white),
+                'quote': ParagraphStyle('RewiredQuote', parent=body, fontName='Helvetica-Oblique',
+                                        textColor=colors.HexColor('#4b5563'), leftIndent=14),
+                'logo': ParagraphStyle('RewiredLogo', parent=heading, fontSize=32, leading=38,
+                                       alignment=TA_CENTER, textColor=colors.HexColor('#0f766e')),
+                'subtitle': ParagraphStyle('RewiredSubtitle', parent=body, fontSize=14, leading=18,
+                                           alignment=TA_CENTER, textColor=colors.HexColor('#6b7280')),
+                'note': ParagraphStyle('RewiredNote', parent=body, fontSize=10, leading=14,
+                                       alignment=TA_CENTER, textColor=colors.HexColor('#6b7280'), spaceAfter=4),
+                1: ParagraphStyle('RewiredH1', parent=heading, fontSize=28, leading=34, spaceBefore=20,
+                                  spaceAfter=6, textColor=colors.HexColor('#0f766e')),
+                2: ParagraphStyle('RewiredH2', parent=heading, fontSize=20, leading=24, spaceBefore=26,
+                                  spaceAfter=12, textColor=colors.HexColor('#0f766e')),
+                3: ParagraphStyle('RewiredH3', parent=heading, fontSize=16, leading=20, spaceBefore=18,
+                                  spaceAfter=10, textColor=colors.HexColor('#14b8a6')),
+                4: ParagraphStyle('RewiredH4', parent=heading, fontSize=14, leading=17, spaceBefore=14,
+                                  spaceAfter=8, textColor=colors.HexColor('#f59e0b')),
+            }
+        return self._styles
+
+    def flowables(self, blocks, width, box=None):
+        from reportlab.lib import colors
+        from reportlab.platypus import HRFlowable, ListFlowable, ListItem, PageBreak, Paragraph, Table, TableStyle
+
+        styles = self.styles()
+        flowables = []
+        for block in blocks:
+            if block.kind == 'heading':
+                style = styles[min(block.level, 4)]
+                if box == 'exercise-box' and block.level >= 4:
+                    style = style.clone('RewiredExerciseHeading', textColor=colors.HexColor('#7c3aed'), spaceBefore=0)
+                flowables.append(Paragraph(block.text, style))
+                if block.level == 1:
+                    flowables.append(HRFlowable(width='100%', thickness=3, color=colors.HexColor('#0f766e'),
+                                                spaceAfter=14))
+            elif block.kind == 'paragraph':
+                flowables.append(Paragraph(block.text, styles['body']))
+            elif block.kind == 'rule':
+                flowables.append(HRFlowable(width='100%', thickness=1, color=colors.HexColor('#e5e7eb'),
+                                            spaceBefore=6, spaceAfter=12))
+            elif block.kind == 'page_break':
+                flowables.append(PageBreak())
+            elif block.kind == 'list':
+                items = [ListItem(self.flowables(item.children, width - 24, box) or [Paragraph('', styles['item'])])
+                         for item in block.children]
+                options = {'leftIndent': 18, 'bulletColor': colors.HexColor('#0f766e'), 'spaceAfter': 8}
+                if block.css_class == 'checklist':
+                    options.update(bulletType='bullet', start='o', bulletFontName='ZapfDingbats')
+                elif block.css_class == 'ol':
+                    options.update(bulletType='1', bulletFontName='Helvetica')
+                else:
+                    options.update(bulletType='bullet', start='•', bulletFontName='Helvetica')
+                flowables.append(ListFlowable(items, **options))
+            elif block.kind == 'table' and block.rows:
+                columns = max(len(cells) for _, cells in block.rows)
+                data = [[Paragraph(text, styles['th' if header else 'cell']) for text in cells]
+                        + [''] * (columns - len(cells)) for header, cells in block.rows]
+                commands = [('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                            ('LINEBELOW', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
+                            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f9fafb')])]
+                commands.extend(('BACKGROUND', (0, row), (-1, row), colors.HexColor('#0f766e'))
+                                for row, (header, _) in enumerate(block.rows) if header)
+                table = Table(data, colWidths=[width / columns] * columns, style=TableStyle(commands),
+                              spaceBefore=8, spaceAfter=14, repeatRows=1 if block.rows[0][0] else 0)
+                flowables.append(table)
+            elif block.kind == 'quote':
+                for child in block.children:
+                    if child.kind == 'paragraph':
+                        flowables.append(Paragraph(child.text, styles['quote']))
+                    else:
+                        flowables.extend(self.flowables([child], width - 14, box))
+            elif block.kind == 'box':
+                flowables.append(self.box(block, width))
+        return flowables
+
+    def box(self, block, width):
+        """A box as a one-column table, one row per child, so it can split across pages"""
+        from reportlab.lib import colors
+        from reportlab.platypus import Paragraph, Table, TableStyle
+
+        background, border, left_only = {
+            'exercise-box': ('#ede9fe', '#8b5cf6', False),
+            'tip-box': ('#f0fdfa', '#14b8a6', False),
+            'section-box': ('#f0fdfa', '#0f766e', True),
+            'highlight-box': ('#fef3c7', '#f59e0b', True),
+        }[block.css_class]
+        inner = width - 28
+        children = self.flowables(block.children, inner, block.css_class)
+        if block.css_class == 'tip-box':
+            children.insert(0, Paragraph('<font color="#0f766e"><b>TIP:</b></font>', self.styles()['body']))
+        rows = [[flowable] for flowable in children] or [['']]
+        commands = [('BACKGROUND', (0, 0), (-1, -1), colors.HexColor(background)),
+                    ('LEFTPADDING', (0, 0), (-1, -1), 14), ('RIGHTPADDING', (0, 0), (-1, -1), 14),
+                    ('TOPPADDING', (0, 0), (-1, -1), 2), ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+                    ('TOPPADDING', (0, 0), (-1, 0), 12), ('BOTTOMPADDING', (0, -1), (-1, -1), 10)]
+        if left_only:
+            commands.append(('LINEBEFORE', (0, 0), (0, -1), 4, colors.HexColor(border)))
+        else:
+            commands.append(('BOX', (0, 0), (-1, -1), 2, colors.HexColor(border)))
+        return Table(rows, colWidths=[width], style=TableStyle(commands), spaceBefore=10, spaceAfter=14)
+
+    def render(self, document, deterministic=False):
+        """
+        Returns:
+            (PDF bytes, page count, False)
+        """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.pdfgen import canvas
+        from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate, Spacer
+
+        class NumberedCanvas(canvas.Canvas):
+            """Holds pages back until the end so the footer can say "Page X of Y" """
+
+            def __init__(self, *args, **kwargs):
+                canvas.Canvas.__init__(self, *args, **kwargs)
+                self._saved_pages = []
+
+            def showPage(self):
+                self._saved_pages.append(dict(self.__dict__))
+                self._startPage()
+
+            def save(self):
+                total = len(self._saved_pages)
+                for state in self._saved_pages:
+                    self.__dict__.update(state)
+                    self.setFont('Helvetica', 9)
+                    self.setFillColor(colors.HexColor('#6b7280'))
+                    self.drawCentredString(letter[0] / 2, 0.45 * inch,
+                                           FOOTER_TEXT.format(page=self._pageNumber, pages=total))
+                    canvas.Canvas.showPage(self)
+                canvas.Canvas.save(self)
+
+        styles = self.styles()
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter, title=document.title, subject=document.subtitle,
+                                rightMargin=0.75*inch, leftMargin=0.75*inch,
+                                topMargin=0.75*inch, bottomMargin=0.75*inch,
+                                invariant=1 if deterministic else None)
+        elements = [Paragraph('REWIRED', styles['logo']), Paragraph(escape(document.subtitle), styles['subtitle']),
+                    HRFlowable(width='100%', thickness=2, color=colors.HexColor('#0f766e'), spaceBefore=12,
+                               spaceAfter=24)]
+        elements.extend(self.flowables(document.blocks, doc.width))
+        elements.extend([Spacer(1, 24), HRFlowable(width='100%', thickness=2, color=colors.HexColor('#e5e7eb'),
+                                                   spaceAfter=14),
+                         Paragraph('<font color="#0f766e"><b>Need more support?</b></font>', styles['note']),
+                         Paragraph('Visit <font color="#0f766e"><b>shauncritzer.com</b></font> for courses, '
+                                   'coaching, and community.', styles['note']),
+                         Paragraph('AI Coach available 24/7 at shauncritzer.com/ai-coach', styles['note'])])
+        doc.build(elements, canvasmaker=NumberedCanvas)
+        return buffer.getvalue(), doc.page, False
+
+
+_engines = {}
+
+
+def get_engine(name):
+    """This process's engine instance by name"""
+    if name not in _engines:
+        _engines[name] = {'weasyprint': WeasyPrintEngine, 'reportlab': ReportLabEngine}[name]()
+    return _engines[name]
+
+
+def record_timing(engine, document, seconds, path=DEFAULT_TIMINGS_PATH):
+    """Append one render's seconds per block (single O_APPEND write, safe across workers)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = json.dumps({'engine': engine, 'blocks': document.size(), 'seconds': round(seconds, 5)}) + '\n'
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+    if os.path.getsize(path) > TIMINGS_COMPACT_BYTES:
+        compact_timings(path)
+
+
+def read_timings(path=DEFAULT_TIMINGS_PATH):
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def compact_timings(path=DEFAULT_TIMINGS_PATH):
+    """Keep the newest TIMINGS_KEPT records per engine"""
+    with open(f"{path}.lock", 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        records = read_timings(path)
+        kept = []
+        for engine in ENGINES:
+            kept.extend([r for r in records if r.get('engine') == engine][-TIMINGS_KEPT:])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(r) + '\n' for r in kept)
+        os.replace(tmp_path, path)
+
+
+def engine_rates(path=DEFAULT_TIMINGS_PATH):
+    """{engine: median seconds per block} over the recorded renders"""
+    per_block = {}
+    for record in read_timings(path)[-TIMINGS_KEPT * len(ENGINES):]:
+        if record.get('engine') in ENGINES and record.get('blocks'):
+            per_block.setdefault(record['engine'], []).append(record['seconds'] / record['blocks'])
+    return {engine: statistics.median(values) for engine, values in per_block.items()}
+
+
+def choose_engine(document, rates=None):
+    """
+    Pick the engine for a document: WeasyPrint when the document needs
+    anything ReportLab can't draw, otherwise the one with the lower recorded
+    seconds per block (ReportLab until it has timings of its own)
+
+    Returns:
+        (engine name, reason)
+    """
+    if document.unsupported:
+        return 'weasyprint', f"uses {', '.join(sorted(document.unsupported))}"
+    rates = engine_rates() if rates is None else rates
+    if 'reportlab' not in rates:
+        return 'reportlab', "simple layout, no ReportLab timings yet"
+    if 'weasyprint' not in rates or rates['reportlab'] <= rates['weasyprint']:
+        return 'reportlab', f"{rates['reportlab'] * 1000:.2f} ms/block recorded"
+    return 'weasyprint', f"{rates['weasyprint'] * 1000:.2f} ms/block vs {rates['reportlab'] * 1000:.2f} for ReportLab"
+
+
+def render_document(document, engine='auto', deterministic=False, timings_path=DEFAULT_TIMINGS_PATH):
+    """
+    Render a DocumentModel with the named engine, or the one choose_engine() picks
+
+    Raises:
+        ValueError: ReportLab was asked for a document it can't render
+
+    Returns:
+        dict with engine, reason, data, pages, cached and seconds
+    """
+    reason = 'requested'
+    if engine == 'auto':
+        engine, reason = choose_engine(document)
+    renderer = get_engine(engine)
+    if not renderer.supports(document):
+        raise ValueError(f"{engine} can't render this document (uses {', '.join(sorted(document.unsupported))})")
+
+    started = time.perf_counter()
+    data, pages, cached = renderer.render(document, deterministic)
+    seconds = time.perf_counter() - started
+    if not cached and timings_path:
+        record_timing(engine, document, seconds, timings_path)
+    return {'engine': engine, 'reason': reason, 'data': data, 'pages': pages, 'cached': cached,
+            'seconds': seconds}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show which engine each document would use")
+    parser.add_argument('sources', nargs='+', help="Markdown files (globs allowed)")
+    args = parser.parse_args(argv)
+
+    rates = engine_rates()
+    for engine in ENGINES:
+        rate = rates.get(engine)
+        print(f"   {engine:<11} {f'{rate * 1000:.2f} ms/block' if rate else 'no timings yet'}")
+    print()
+    for path in (path for pattern in args.sources for path in (glob.glob(pattern) or [pattern])):
+        document = DocumentModel.from_markdown(path)
+        engine, reason = choose_engine(document, rates)
+        print(f"   {os.path.basename(path):<45} {document.size():>5} blocks  {engine:<11} {reason}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Linearized ("fast web view") output and a byte-range check
+
+A linearized PDF starts with the first page and everything it needs, plus
+hint tables telling the viewer where every other page lives, so a browser
+can show page one after the first few KB and fetch later pages with range
+requests instead of downloading the whole file. qpdf (through pikepdf, pip3
+install pikepdf) rewrites a finished PDF that way.
+
+check_ranges() then verifies the result from the file's own cross-reference
+table: page one's objects must all sit before the end of the first-page
+section (/E in the linearization dictionary), and every other page may only
+need a small slice of the file beyond what page one already loaded.
+
+    python3 pdf_linearize.py ../client/public/*.pdf                 # linearize in place and check
+    python3 pdf_linearize.py ../client/public/*.pdf --check-only
+"""
+
+import argparse
+import glob
+import io
+import os
+import re
+import sys
+
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject
+
+# Largest share of the file a single later page may need beyond page one
+DEFAULT_MAX_FRACTION = 0.25
+
+LINEARIZED_RE = re.compile(rb'<<[^>]*/Linearized\b[^>]*>>')
+
+
+def linearization_available():
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def linearize_pdf(source, output=None):
+    """
+    Rewrite a PDF linearized, first page first
+
+    Args:
+        source: PDF path or bytes
+        output: Optional path or writable binary file object (may be the
+            source path)
+
+    Returns:
+        The linearized bytes
+    """
+    import pikepdf
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            original = f.read()
+    else:
+        original = bytes(source)
+
+    buffer = io.BytesIO()
+    with pikepdf.open(io.BytesIO(original)) as pdf:
+        pdf.save(buffer, linearize=True, deterministic_id=True)
+    data = buffer.getvalue()
+
+    if isinstance(output, (str, os.PathLike)):
+        tmp_path = f"{output}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, output)
+    elif output is not None:
+        output.write(data)
+    return data
+
+
+def first_page_end(data):
+    """/E from the linearization dictionary, or None when the file isn't linearized"""
+    match = LINEARIZED_RE.search(data[:1024])
+    if not match:
+        return None
+    end = re.search(rb'/E\s+(\d+)', match.group(0))
+    return int(end.group(1)) if end else None
+
+
+def object_extents(reader, size):
+    """
+    Byte range of every object in the file
+
+    Objects inside an object stream map to the whole stream, since that is
+    what a viewer has to fetch.
+
+    Returns:
+        {object number: (start, end)}
+    """
+    offsets = {}
+    for table in reader.xref.values():
+        offsets.update(table)
+    starts = sorted(set(offsets.values())) + [size]
+    end_of = {start: starts[i + 1] for i, start in enumerate(starts[:-1])}
+    extents = {number: (offset, end_of[offset]) for number, offset in offsets.items()}
+    for number, (stream_number, _) in reader.xref_objStm.items():
+        if stream_number in extents:
+            extents[number] = extents[stream_number]
+    return extents
+
+
+def page_objects(page):
+    """Object numbers a page needs: itself, its content and resources (not its parents)"""
+    found = set()
+    pending = [page.indirect_reference]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, IndirectObject):
+            if item.idnum in found:
+                continue
+            found.add(item.idnum)
+            item = item.get_object()
+        if isinstance(item, DictionaryObject):
+            pending.extend(value for key, value in item.items() if key not in ('/Parent', '/P'))
+        elif isinstance(item, ArrayObject):
+            pending.extend(item)
+    return found
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+def page_ranges(data):
+    """
+    Byte ranges a viewer needs for each page, beyond page one's
+
+    Returns:
+        List of (page number, [(start, end), ...]), page one's ranges
+        being everything it needs
+    """
+    reader = PdfReader(io.BytesIO(data))
+    extents = object_extents(reader, len(data))
+    first = set()
+    report = []
+    for number, page in enumerate(reader.pages, start=1):
+        needed = {extents[n] for n in page_objects(page) if n in extents}
+        if number == 1:
+            first = needed
+        else:
+            needed -= first
+        report.append((number, merge_ranges(needed)))
+    return report
+
+
+def check_ranges(data, max_fraction=DEFAULT_MAX_FRACTION):
+    """
+    Check that page one loads from the head of the file and no other page
+    needs more than max_fraction of it
+
+    Returns:
+        (ok, list of problem strings, page_ranges() report)
+    """
+    problems = []
+    end = first_page_end(data)
+    report = page_ranges(data)
+    if end is None:
+        problems.append("not linearized")
+    elif report and report[0][1] and max(stop for _, stop in report[0][1]) > end:
+        problems.append(f"page 1 needs bytes past the first-page section (/E {end})")
+
+    limit = len(data) * max_fraction
+    for number, ranges in report[1:]:
+        needed = sum(stop - start for start, stop in ranges)
+        if needed > limit:
+            problems.append(f"page {number} needs {needed} bytes in {len(ranges)} range(s), "
+                            f"over {max_fraction:.0%} of the file")
+    return not problems, problems, report
+
+
+def format_report(name, data, report):
+    first = sum(stop - start for start, stop in report[0][1]) if report else 0
+    later = [sum(stop - start for start, stop in ranges) for _, ranges in report[1:]]
+    worst = max(later, default=0)
+    return (f"{name:<50} {len(data) / 1024:>8.1f} KB  page 1: {first / 1024:.1f} KB  "
+            f"largest later page: {worst / 1024:.1f} KB ({worst / len(data) if data else 0:.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Linearize PDFs for fast web view and check their byte ranges")
+    parser.add_argument('pdfs', nargs='+', help="PDF files (globs allowed)")
+    parser.add_argument('--check-only', action='store_true', help="Don't rewrite, only check")
+    parser.add_argument('--max-fraction', type=float, default=DEFAULT_MAX_FRACTION,
+                        help="Largest share of the file one later page may need (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if not args.check_only and not linearization_available():
+        print("❌ pikepdf not installed (pip3 install pikepdf)")
+        return 1
+
+    failed = 0
+    for path in (path for pattern in args.pdfs for path in (glob.glob(pattern) or [pattern])):
+        if args.check_only:
+            with open(path, 'rb') as f:
+                data = f.read()
+        else:
+            data = linearize_pdf(path, path)
+        ok, problems, report = check_ranges(data, args.max_fraction)
+        failed += not ok
+        print(f"   {'✓' if ok else '✗'} {format_report(os.path.basename(path), data, report)}")
+        for problem in problems:
+            print(f"       {problem}")
+
+    if failed:
+        print(f"\n❌ {failed} PDF(s) failed the range check")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Content hash and ETag sidecars for published PDFs
+
+With deterministic output (generate_pdf.py --deterministic,
+create_recovery_toolkit_pdf(deterministic=True)) unchanged inputs give
+byte-identical PDFs, so a hash of the bytes identifies a version. Every
+such PDF gets a sidecar next to it:
+
+    recovery-toolkit.pdf.json
+    {"file": "recovery-toolkit.pdf", "bytes": 12755, "content_type": "application/pdf",
+     "sha256": "9b1f...", "etag": "\\"4c1e67ea...\\""}
+
+etag is the quoted MD5 of the file, the same value S3 and CloudFront report
+for a single-part upload, so the upload step can compare it with the
+remote object's ETag and skip files that haven't changed, and clients keep
+their cached copies.
+
+    python3 pdf_manifest.py ../client/public/*.pdf            # write or refresh sidecars
+    python3 pdf_manifest.py ../client/public/*.pdf --check    # list PDFs whose sidecar is stale
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+
+
+def source_date():
+    """
+    The pinned document date for deterministic output: SOURCE_DATE_EPOCH
+    (the reproducible-builds convention) as a W3C date, or None for no date
+    """
+    epoch = os.environ.get('SOURCE_DATE_EPOCH', '').strip()
+    if not epoch:
+        return None
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(int(epoch)))
+
+
+def build_manifest(data, name):
+    return {
+        'file': name,
+        'bytes': len(data),
+        'content_type': 'application/pdf',
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'etag': f'"{hashlib.md5(data).hexdigest()}"',
+    }
+
+
+def manifest_path(pdf_path):
+    return f"{pdf_path}.json"
+
+
+def write_manifest(pdf_path, data=None):
+    """
+    Write the sidecar for a PDF (read from disk unless its bytes are given)
+
+    Returns:
+        The manifest dict
+    """
+    if data is None:
+        with open(pdf_path, 'rb') as f:
+            data = f.read()
+    manifest = build_manifest(data, os.path.basename(pdf_path))
+    path = manifest_path(pdf_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_manifest(pdf_path):
+    try:
+        with open(manifest_path(pdf_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def is_current(pdf_path):
+    """Whether the PDF still matches the hash in its sidecar"""
+    manifest = read_manifest(pdf_path)
+    if manifest is None or manifest.get('bytes') != os.path.getsize(pdf_path):
+        return False
+    with open(pdf_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest() == manifest.get('sha256')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write content hash / ETag sidecars for PDFs")
+    parser.add_argument('pdfs', nargs='+', help="PDF files (globs allowed)")
+    parser.add_argument('--check', action='store_true', help="Only report PDFs whose sidecar is missing or stale")
+    args = parser.parse_args(argv)
+
+    paths = [path for pattern in args.pdfs for path in (glob.glob(pattern) or [pattern])]
+    if args.check:
+        stale = [path for path in paths if not is_current(path)]
+        for path in stale:
+            print(f"   ✗ {path}")
+        print(f"{'❌' if stale else '✅'} {len(stale)} of {len(paths)} sidecar(s) stale")
+        return 1 if stale else 0
+
+    for path in paths:
+        manifest = write_manifest(path)
+        print(f"   ✓ {path:<60} {manifest['etag']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
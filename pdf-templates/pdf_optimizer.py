@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Size optimizer for generated PDFs
+
+Runs after generate_pdf() or create_recovery_toolkit_pdf() and shrinks the
+file without touching its layout:
+
+- embedded images are downscaled to at most IMAGE_LEVELS' DPI for the page
+  they sit on and recompressed as JPEG (images with transparency are left alone)
+- identical objects (images, fonts, streams) are stored once
+- page content streams are Flate-compressed
+- objects are packed into compressed object streams (needs pikepdf; the
+  step is skipped with a note when it isn't installed)
+
+With a byte budget the image settings step down IMAGE_LEVELS until the
+document fits; the report says whether it did.
+
+    python3 pdf_optimizer.py ../client/public/*.pdf --budget-kb 800
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+
+from pypdf import PdfReader, PdfWriter
+
+# (max DPI at the page's size, JPEG quality), least to most aggressive
+IMAGE_LEVELS = (
+    (200, 85),
+    (150, 75),
+    (110, 65),
+    (80, 50),
+)
+
+
+def object_streams_available():
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def recompress_images(writer, max_dpi, quality):
+    """Downscale and JPEG-recompress every opaque image, once per shared XObject"""
+    from PIL import Image
+
+    seen = set()
+    replaced = 0
+    for page in writer.pages:
+        page_inches = max(float(page.mediabox.width), float(page.mediabox.height)) / 72
+        max_pixels = int(page_inches * max_dpi)
+        for image in page.images:
+            ref = image.indirect_reference
+            if image.is_inline or ref is None or ref.idnum in seen:
+                continue
+            seen.add(ref.idnum)
+            xobject = ref.get_object()
+            if '/SMask' in xobject or '/Mask' in xobject or xobject.get('/ImageMask'):
+                continue
+
+            picture = image.image
+            if picture.mode not in ('RGB', 'L'):
+                picture = picture.convert('RGB')
+            if max(picture.size) > max_pixels:
+                picture = picture.copy()
+                picture.thumbnail((max_pixels, max_pixels), Image.LANCZOS)
+
+            encoded = io.BytesIO()
+            picture.save(encoded, 'JPEG', quality=quality, optimize=True)
+            if encoded.tell() >= len(getattr(xobject, '_data', b'') or b''):
+                continue
+            image.replace(picture, quality=quality, optimize=True)
+            replaced += 1
+    return replaced
+
+
+def pack_object_streams(data):
+    """Re-save with compressed object streams and recompressed Flate streams"""
+    import pikepdf
+
+    output = io.BytesIO()
+    with pikepdf.open(io.BytesIO(data)) as pdf:
+        # deterministic_id: the same input gives the same bytes (see pdf_manifest.py)
+        pdf.save(output, object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                 compress_streams=True, recompress_flate=True, deterministic_id=True)
+    return output.getvalue()
+
+
+def optimize_once(data, image_level=None):
+    """
+    One optimization pass over PDF bytes
+
+    Returns:
+        (optimized bytes, images replaced)
+    """
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(data)))
+    replaced = recompress_images(writer, *image_level) if image_level else 0
+    for page in writer.pages:
+        page.compress_content_streams()
+    writer.compress_identical_objects(remove_duplicates=True, remove_unreferenced=True)
+
+    output = io.BytesIO()
+    writer.write(output)
+    optimized = output.getvalue()
+    if object_streams_available():
+        optimized = pack_object_streams(optimized)
+    return optimized, replaced
+
+
+def optimize_pdf(source, output=None, budget=None):
+    """
+    Shrink a PDF, stepping down image quality until it fits a byte budget
+
+    Args:
+        source: PDF path or bytes
+        output: Optional path or writable binary file object for the result
+            (may be the source path)
+        budget: Byte budget; without one a single pass at the first
+            IMAGE_LEVELS entry is made
+
+    Returns:
+        dict with before, after, images, level (index into IMAGE_LEVELS),
+        object_streams, within_budget and data (the optimized bytes)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            original = f.read()
+    else:
+        original = bytes(source)
+
+    best = (original, 0, None)
+    for index, level in enumerate(IMAGE_LEVELS):
+        data, replaced = optimize_once(original, level)
+        if len(data) < len(best[0]):
+            best = (data, replaced, index)
+        if budget is None or len(best[0]) <= budget:
+            break
+
+    data, replaced, index = best
+    if isinstance(output, (str, os.PathLike)):
+        tmp_path = f"{output}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, output)
+    elif output is not None:
+        output.write(data)
+
+    return {
+        'before': len(original),
+        'after': len(data),
+        'images': replaced,
+        'level': index,
+        'object_streams': object_streams_available(),
+        'within_budget': budget is None or len(data) <= budget,
+        'data': data,
+    }
+
+
+def format_report(name, result, budget=None):
+    saved = (1 - result['after'] / result['before']) * 100 if result['before'] else 0
+    line = (f"{name:<50} {result['before'] / 1024:>9.1f} KB -> {result['after'] / 1024:>9.1f} KB "
+            f"({saved:>5.1f}% smaller, {result['images']} images)")
+    if budget is not None and not result['within_budget']:
+        line += f"  over the {budget / 1024:.0f} KB budget"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shrink generated PDFs")
+    parser.add_argument('pdfs', nargs='+', help="PDF files (globs allowed)")
+    parser.add_argument('--budget-kb', type=int, default=None, help="Per-document size budget in KB")
+    parser.add_argument('-o', '--out-dir', default=None, help="Write here instead of optimizing in place")
+    args = parser.parse_args(argv)
+
+    paths = [path for pattern in args.pdfs for path in (glob.glob(pattern) or [pattern])]
+    budget = args.budget_kb * 1024 if args.budget_kb else None
+    if not object_streams_available():
+        print("⚠️  pikepdf not installed - skipping object stream packing (pip3 install pikepdf)")
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    over_budget = 0
+    for path in paths:
+        output = os.path.join(args.out_dir, os.path.basename(path)) if args.out_dir else path
+        result = optimize_pdf(path, output, budget)
+        over_budget += not result['within_budget']
+        print(f"   {'✓' if result['within_budget'] else '✗'} {format_report(os.path.basename(path), result, budget)}")
+
+    if over_budget:
+        print(f"\n❌ {over_budget} document(s) over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
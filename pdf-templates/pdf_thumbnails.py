@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Cover thumbnails for product cards, taken from the PDF that was just rendered
+
+WeasyPrint can't paint its laid-out document to an image: write_png() went
+away in version 53, and its Document only produces PDF. So the layout can't
+be reused for thumbnails. Instead, the finished PDF bytes are handed to
+PDFium (pypdfium2, see requirements.txt) while they are still in memory.
+That is a second rasterizing pass, but not a second layout, and it only
+touches the selected pages. Each page is rasterized once, at the largest
+requested width, and scaled down with Pillow for the smaller sizes.
+
+Thumbnails are named by page and width, e.g. rewired_relief_toolkit-p1-400.png
+next to rewired_relief_toolkit.pdf. With a RenderCache they are stored under
+the PDF's cache key, so a cache hit returns its thumbnails without
+rasterizing anything.
+
+    python3 pdf_thumbnails.py ../client/public/*.pdf --widths 400,200 --format webp
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+
+DEFAULT_WIDTH = 400
+FORMATS = {'png': 'PNG', 'webp': 'WEBP'}
+
+
+MISSING_MESSAGE = "thumbnails need pypdfium2 and Pillow (pip3 install pypdfium2 Pillow, see requirements.txt)"
+
+
+def thumbnails_available():
+    try:
+        import pypdfium2  # noqa: F401
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def thumbnail_name(page, width, image_format='png'):
+    """Name of one thumbnail, e.g. "p1-400.png" (pages count from 1)"""
+    return f"p{page}-{width}.{image_format}"
+
+
+def rasterize(data, pages=(1,), widths=(DEFAULT_WIDTH,), image_format='png', quality=80):
+    """
+    Rasterize pages of a PDF into thumbnails
+
+    Args:
+        data: PDF bytes
+        pages: Page numbers, counting from 1 (pages past the end are skipped)
+        widths: Thumbnail widths in pixels, height follows the page
+        image_format: 'png' or 'webp'
+        quality: WebP quality
+
+    Returns:
+        {thumbnail_name(): image bytes}
+    """
+    import pypdfium2 as pdfium
+    from PIL import Image
+
+    widths = sorted(set(widths), reverse=True)
+    thumbnails = {}
+    pdf = pdfium.PdfDocument(data)
+    try:
+        for page_number in pages:
+            if not 1 <= page_number <= len(pdf):
+                continue
+            page = pdf[page_number - 1]
+            image = page.render(scale=widths[0] / page.get_width()).to_pil().convert('RGB')
+            page.close()
+            for width in widths:
+                if image.width != width:
+                    image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+                encoded = io.BytesIO()
+                options = {'quality': quality} if image_format == 'webp' else {'optimize': True}
+                image.save(encoded, FORMATS[image_format], **options)
+                thumbnails[thumbnail_name(page_number, width, image_format)] = encoded.getvalue()
+    finally:
+        pdf.close()
+    return thumbnails
+
+
+def make_thumbnails(data, cache=None, key=None, pages=(1,), widths=(DEFAULT_WIDTH,), image_format='png'):
+    """
+    rasterize(), reusing and filling a RenderCache entry when one is given
+
+    Args:
+        cache: Optional RenderCache holding the PDF's entry
+        key: The PDF's cache key (PdfRenderer.cache_key())
+    """
+    names = [thumbnail_name(page, width, image_format) for page in pages for width in widths]
+    if cache is not None and key:
+        cached = {name: cache.get_extra(key, name) for name in names}
+        if all(image is not None for image in cached.values()):
+            return cached
+
+    thumbnails = rasterize(data, pages, widths, image_format)
+    if cache is not None and key:
+        cache.put_extras(key, thumbnails)
+    return thumbnails
+
+
+def thumbnail_path(pdf_path, name):
+    """Where a thumbnail goes next to its PDF: foo.pdf -> foo-p1-400.png"""
+    return f"{os.path.splitext(pdf_path)[0]}-{name}"
+
+
+def write_thumbnails(thumbnails, pdf_path):
+    """Save thumbnails next to pdf_path, returning their paths"""
+    paths = []
+    for name, image in sorted(thumbnails.items()):
+        path = thumbnail_path(pdf_path, name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(image)
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+def parse_numbers(text):
+    """"1,3" -> (1, 3), for the --pages and --widths options"""
+    return tuple(int(part) for part in text.split(',') if part.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write cover thumbnails for existing PDFs")
+    parser.add_argument('pdfs', nargs='+', help="PDF files (globs allowed)")
+    parser.add_argument('--pages', type=parse_numbers, default=(1,), help="Pages, from 1 (default: 1)")
+    parser.add_argument('--widths', type=parse_numbers, default=(DEFAULT_WIDTH,),
+                        help=f"Widths in pixels (default: {DEFAULT_WIDTH})")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='png')
+    args = parser.parse_args(argv)
+
+    if not thumbnails_available():
+        print(f"❌ The {MISSING_MESSAGE}")
+        return 1
+
+    for path in (path for pattern in args.pdfs for path in (glob.glob(pattern) or [pattern])):
+        with open(path, 'rb') as f:
+            thumbnails = rasterize(f.read(), args.pages, args.widths, args.format)
+        for written in write_thumbnails(thumbnails, path):
+            print(f"   ✓ {written}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
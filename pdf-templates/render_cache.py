@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache of rendered PDFs
+
+Entries are keyed by PdfRenderer.cache_key(): a hash of the template, the
+registered fonts, the WeasyPrint version and the title/subtitle/content, so a
+hit is always the exact PDF the renderer would have produced. Each entry is
+two files under a two-character fan-out directory:
+
+    .cache/pdf/3f/3fa9...e1.pdf     the PDF
+    .cache/pdf/3f/3fa9...e1.json    {"pages": 12}
+
+plus any extras stored with the PDF, such as its cover thumbnails
+(.cache/pdf/3f/3fa9...e1.p1-400.png), which count towards max_bytes and are
+evicted together with it. Extras whose PDF is already gone are evicted as
+entries of their own.
+
+Both are written to a temp file and renamed into place, and the sidecar is
+written last and removed first, so worker processes sharing the directory
+never read half an entry. Hits bump the PDF's mtime; once the PDFs exceed
+max_bytes the least recently used entries are evicted by whichever process
+gets the eviction lock.
+"""
+
+import fcntl
+import json
+import os
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'pdf')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class RenderCache:
+    """
+    Args:
+        cache_dir: Directory shared by every process using the cache
+        max_bytes: Size cap for the stored PDFs, enforced with LRU eviction
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def paths(self, key):
+        entry = os.path.join(self.cache_dir, key[:2], key)
+        return entry + '.pdf', entry + '.json'
+
+    def get(self, key):
+        """
+        Returns:
+            (PDF bytes, info dict) or None on a miss
+        """
+        pdf_path, info_path = self.paths(key)
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            with open(pdf_path, 'rb') as f:
+                data = f.read()
+            os.utime(pdf_path)
+        except (FileNotFoundError, ValueError):
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return data, info
+
+    def put(self, key, data, info=None):
+        pdf_path, info_path = self.paths(key)
+        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+        self._write(pdf_path, data)
+        self._write(info_path, json.dumps(info or {}).encode('utf-8'))
+        self.evict()
+
+    def extra_path(self, key, name):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{name}")
+
+    def get_extra(self, key, name):
+        """Bytes stored with an entry by put_extra(), or None"""
+        try:
+            with open(self.extra_path(key, name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_extra(self, key, name, data):
+        self.put_extras(key, {name: data})
+
+    def put_extras(self, key, extras):
+        """Store {name: bytes} with an entry, then evict like put() does"""
+        for name, data in extras.items():
+            path = self.extra_path(key, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write(path, data)
+        self.evict()
+
+    def _write(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        """
+        (mtime, size of the PDF and its extras, pdf path) for every stored
+        PDF, and for every set of extras left without one
+        """
+        found = []
+        if not os.path.isdir(self.cache_dir):
+            return found
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            pdfs, extras = {}, {}
+            for entry in os.scandir(shard.path):
+                key, _, suffix = entry.name.partition('.')
+                if suffix.endswith('.tmp') or suffix == 'json':
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if suffix == 'pdf':
+                    pdfs[key] = (stat.st_mtime, stat.st_size, entry.path)
+                else:
+                    mtime, size = extras.get(key, (0, 0))
+                    extras[key] = (max(mtime, stat.st_mtime), size + stat.st_size)
+            found.extend((mtime, size + extras.get(key, (0, 0))[1], path)
+                         for key, (mtime, size, path) in pdfs.items())
+            found.extend((mtime, size, os.path.join(shard.path, f"{key}.pdf"))
+                         for key, (mtime, size) in extras.items() if key not in pdfs)
+        return found
+
+    def _remove(self, pdf_path):
+        """Remove an entry: sidecar first, then its extras, then the PDF"""
+        entry = pdf_path[:-len('.pdf')]
+        prefix = os.path.basename(entry) + '.'
+        extras = [os.path.join(os.path.dirname(entry), name) for name in os.listdir(os.path.dirname(entry))
+                  if name.startswith(prefix) and name[len(prefix):] not in ('pdf', 'json')]
+        for path in (entry + '.json', *extras, pdf_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, '.evict.lock'), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is already evicting
+                return
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, pdf_path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(pdf_path)
+                total -= size
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        for _, _, pdf_path in self.entries():
+            self._remove(pdf_path)
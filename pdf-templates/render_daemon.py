@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Local PDF render daemon for REWIRED Resources
+
+Keeps a pool of pre-warmed worker processes (each holding a PdfRenderer)
+behind a small HTTP service, so callers such as the Node server don't pay
+WeasyPrint's import and startup cost on every PDF.
+
+    POST /render   {"title": ..., "subtitle": ..., "content_html": ...}
+                   -> 200 application/pdf
+                   -> 413 when the render outgrows the per-job memory budget
+                   -> 429 when the job queue is full (see Retry-After)
+                   -> 503 when no worker is running, or none picked the job up in time
+                   -> 504 when the render takes longer than the job timeout
+    GET  /health   -> pool and queue statistics as JSON
+
+With --memory-budget-mb every render runs under a MemoryGuard (see
+render_memory.py): a job that outgrows its budget is aborted with a 413
+instead of taking its worker and neighbours down with it, every response
+carries the job's peak and steady-state memory in X-Render-Memory, and a
+worker whose steady-state memory drifts past --max-drift-mb is recycled.
+
+Run with: python3 generate_pdf.py serve [--port 8765 | --socket /tmp/rewired-pdf.sock]
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import multiprocessing
+import os
+import queue
+import socketserver
+import threading
+import time
+
+CHUNK_SIZE = 64 * 1024
+
+# Posted once by each worker after its renderer is warm
+READY = 'ready'
+
+# Seconds before retrying a worker that failed to start, doubling up to the maximum
+RESTART_DELAY = 0.5
+MAX_RESTART_DELAY = 30
+
+# Seconds a request waits past the job timeout before giving up on its dispatcher
+JOB_GRACE = 10
+
+
+class PoolUnavailable(RuntimeError):
+    """No worker process is running to take the job"""
+
+
+def _worker_main(conn, memory_options=None):
+    """Worker process: build a warm renderer, then render jobs until told to stop"""
+    from generate_pdf import PdfRenderer
+    from render_memory import MemoryBudgetExceeded, set_max_drift
+
+    memory_options = dict(memory_options or {})
+    if 'max_drift' in memory_options:
+        set_max_drift(memory_options.pop('max_drift'))
+    renderer = PdfRenderer(memory_budget=memory_options.get('budget'), trace_memory=memory_options.get('trace', False))
+    # Pay for font discovery and the first layout before real jobs arrive
+    # (under a budget this also sets the baseline that drift is measured from)
+    renderer.pdf_bytes('', '', '<p>warm-up</p>')
+    conn.send((READY, None))
+
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        renderer.last_memory = None
+        try:
+            data, _ = renderer.pdf_bytes(job['title'], job['subtitle'], job['content_html'])
+            conn.send(('ok', data, renderer.last_memory))
+        except MemoryBudgetExceeded as e:
+            conn.send(('memory', str(e), e.stats))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}", renderer.last_memory))
+    conn.close()
+
+
+class RenderJob:
+    """One queued render request and, once finished, its outcome"""
+
+    def __init__(self, title, subtitle, content_html):
+        self.payload = {'title': title, 'subtitle': subtitle, 'content_html': content_html}
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self.status = None  # 'ok', 'error', 'memory' or 'timeout'
+        self.result = None  # PDF bytes or an error message
+        self.memory = None  # The render's memory figures under a budget
+
+    def claim(self):
+        """Called by the dispatcher that takes the job; False when its request gave up waiting"""
+        with self._lock:
+            if not self.cancelled:
+                self.started.set()
+            return not self.cancelled
+
+    def cancel(self):
+        """Withdraw a job no dispatcher has claimed yet; False when one already has"""
+        with self._lock:
+            self.cancelled = not self.started.is_set()
+            return self.cancelled
+
+    def finish(self, status, result, memory=None):
+        self.status = status
+        self.result = result
+        self.memory = memory
+        self.done.set()
+
+
+class WorkerSlot:
+    """A single worker process plus the thread that feeds it jobs"""
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.jobs_done = 0
+
+    def start(self):
+        ctx = multiprocessing.get_context('spawn')
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(target=_worker_main, args=(child_conn, self.pool.memory_options), daemon=True,
+                              name=f"rewired-pdf-worker-{self.index}")
+        try:
+            process.start()
+            child_conn.close()
+            message, _ = parent_conn.recv()
+            if message != READY:
+                raise RuntimeError(f"worker {self.index} failed to start")
+        except BaseException:
+            # Don't leave a half-started worker or its pipe behind
+            child_conn.close()
+            parent_conn.close()
+            if process.is_alive():
+                process.kill()
+                process.join()
+            raise
+        self.process = process
+        self.conn = parent_conn
+        self.jobs_done = 0
+
+    def stop(self, kill=False):
+        if self.process is None:
+            return
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+
+    def restart(self, kill=False):
+        """
+        Replace the worker, retrying with backoff while a new one fails to
+        start (the slot takes no jobs meanwhile)
+
+        Returns:
+            False when the pool shut down before a worker came up
+        """
+        self.pool.mark(self, live=False)
+        try:
+            self.stop(kill=kill)
+        except Exception:
+            self.process = None
+        self.pool.count('recycled')
+        delay = RESTART_DELAY
+        while not self.pool.stopping.is_set():
+            try:
+                self.start()
+            except Exception as e:
+                self.pool.count('restart_failures')
+                print(f"⚠️  Worker {self.index} failed to start ({type(e).__name__}: {e}), retrying in {delay:g}s")
+                self.pool.stopping.wait(delay)
+                delay = min(delay * 2, MAX_RESTART_DELAY)
+                continue
+            self.pool.mark(self, live=True)
+            return True
+        return False
+
+    def dispatch(self, job):
+        """
+        Render one job on the worker
+
+        Returns:
+            None to keep the worker, 'restart' or 'kill' to replace it
+        """
+        self.conn.send(job.payload)
+        if not self.conn.poll(self.pool.job_timeout):
+            job.finish('timeout', f"render exceeded {self.pool.job_timeout}s")
+            self.pool.count('timeouts')
+            return 'kill'
+        status, result, memory = self.conn.recv()
+        job.finish(status, result, memory)
+        self.pool.count({'ok': 'completed', 'memory': 'memory_aborts'}.get(status, 'failed'))
+        self.jobs_done += 1
+        if memory and memory.get('recycle'):
+            # Aborted mid-layout or drifted above its baseline
+            self.pool.count('memory_recycled')
+            return 'restart'
+        if self.pool.max_jobs_per_worker and self.jobs_done >= self.pool.max_jobs_per_worker:
+            return 'restart'
+        return None
+
+    def run(self):
+        """Dispatcher loop: pull jobs off the shared queue until shutdown"""
+        while True:
+            job = self.pool.jobs.get()
+            if job is None:
+                break
+            if not job.claim():
+                continue
+            self.pool.count('busy')
+            try:
+                replace = self.dispatch(job)
+            except (EOFError, BrokenPipeError, OSError) as e:
+                # Worker died mid-job (e.g. OOM killed) - report and replace it
+                job.finish('error', f"worker crashed: {e}")
+                self.pool.count('failed')
+                replace = 'kill'
+            except Exception as e:
+                # Anything else must not take the dispatcher thread down with it
+                if not job.done.is_set():
+                    job.finish('error', f"{type(e).__name__}: {e}")
+                self.pool.count('failed')
+                replace = 'kill'
+            finally:
+                self.pool.count('busy', -1)
+            if replace and not self.restart(kill=replace == 'kill'):
+                break
+
+
+class RenderPool:
+    """
+    Pre-warmed worker processes fed from a bounded job queue
+
+    Args:
+        workers: Number of worker processes
+        queue_size: Jobs allowed to wait for a worker before submit() rejects
+        job_timeout: Seconds a single render may take before its worker is killed
+        max_jobs_per_worker: Recycle a worker after this many jobs (0 = never)
+        memory_options: set_memory_budget() keyword arguments (budget,
+            trace, max_drift) for every worker, or None for no budget
+    """
+
+    def __init__(self, workers=None, queue_size=16, job_timeout=60, max_jobs_per_worker=200,
+                 memory_options=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.job_timeout = job_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.memory_options = memory_options
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.stats = {'busy': 0, 'completed': 0, 'failed': 0, 'timeouts': 0, 'rejected': 0,
+                      'unavailable': 0, 'abandoned': 0, 'recycled': 0, 'restart_failures': 0,
+                      'memory_aborts': 0, 'memory_recycled': 0}
+        self.live = set()
+        self.slots = []
+        self.threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            slot = WorkerSlot(self, index)
+            slot.start()
+            self.mark(slot, live=True)
+            thread = threading.Thread(target=slot.run, daemon=True)
+            thread.start()
+            self.slots.append(slot)
+            self.threads.append(thread)
+
+    def mark(self, slot, live):
+        with self.lock:
+            if live:
+                self.live.add(slot.index)
+            else:
+                self.live.discard(slot.index)
+
+    def submit(self, title, subtitle, content_html):
+        """
+        Queue a render
+
+        Raises:
+            PoolUnavailable: No worker is running (all are being replaced)
+            queue.Full: The pool is saturated
+        """
+        if not self.live:
+            self.count('unavailable')
+            raise PoolUnavailable('no render workers are running')
+        job = RenderJob(title, subtitle, content_html)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            self.count('rejected')
+            raise
+        return job
+
+    def wait(self, job):
+        """
+        Wait for a submitted job, giving up when it sat in the queue or
+        rendered for longer than any live dispatcher would let it
+
+        Returns:
+            None when it finished, 'unavailable' when no worker took it up
+            (it is withdrawn from the queue), 'timeout' when it was taken up
+            but never reported back
+        """
+        # The whole queue ahead of it, spread over the workers, each job taking up to job_timeout
+        queue_wait = self.job_timeout * (self.jobs.maxsize // self.workers + 1) + JOB_GRACE
+        if not job.started.wait(queue_wait) and job.cancel():
+            self.count('unavailable')
+            return 'unavailable'
+        if not job.done.wait(self.job_timeout + JOB_GRACE):
+            self.count('abandoned')
+            return 'timeout'
+        return None
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def health(self):
+        live = len(self.live)
+        return {
+            'healthy': live > 0,
+            'workers': self.workers,
+            'live_workers': live,
+            'queued': self.jobs.qsize(),
+            'queue_size': self.jobs.maxsize,
+            **self.stats,
+        }
+
+    def shutdown(self):
+        self.stopping.set()
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join(timeout=self.job_timeout)
+        for slot in self.slots:
+            slot.stop()
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'RewiredPdf/1.0'
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            health = self.server.pool.health()
+            self.send_json(200 if health['healthy'] else 503, health)
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/render':
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            args = (body.get('title', ''), body.get('subtitle', ''), body['content_html'])
+        except (ValueError, KeyError, AttributeError) as e:
+            self.send_json(400, {'error': f"expected JSON with content_html: {e}"})
+            return
+
+        try:
+            job = self.server.pool.submit(*args)
+        except queue.Full:
+            self.send_json(429, {'error': 'render queue is full'}, {'Retry-After': '1'})
+            return
+        except PoolUnavailable as e:
+            self.send_json(503, {'error': str(e)}, {'Retry-After': '5'})
+            return
+
+        gave_up = self.server.pool.wait(job)
+        if gave_up == 'unavailable':
+            self.send_json(503, {'error': 'no render worker took the job up in time'}, {'Retry-After': '5'})
+            return
+        if gave_up == 'timeout':
+            self.send_json(504, {'error': 'render worker stopped responding'})
+            return
+        memory_headers = {}
+        if job.memory:
+            memory_headers['X-Render-Memory'] = (f"peak={job.memory['peak_kb']}KB; "
+                                                 f"rss-peak={job.memory['rss_peak_kb']}KB; "
+                                                 f"steady={job.memory['rss_steady_kb']}KB")
+        if job.status == 'timeout':
+            self.send_json(504, {'error': job.result})
+            return
+        if job.status == 'memory':
+            self.send_json(413, {'error': job.result, 'memory': job.memory}, memory_headers)
+            return
+        if job.status != 'ok':
+            self.send_json(500, {'error': job.result})
+            return
+
+        pdf = job.result
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(pdf)))
+        for name, value in memory_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        view = memoryview(pdf)
+        for offset in range(0, len(pdf), CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + CHUNK_SIZE])
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def serve(host='127.0.0.1', port=8765, socket_path=None, workers=None, queue_size=16,
+          job_timeout=60, max_jobs_per_worker=200, memory_options=None):
+    """
+    Start the worker pool and serve render requests until interrupted
+
+    Args:
+        host, port: TCP address to listen on (ignored when socket_path is set)
+        socket_path: Listen on this Unix socket instead of TCP
+        workers, queue_size, job_timeout, max_jobs_per_worker, memory_options:
+            See RenderPool
+    """
+    pool = RenderPool(workers, queue_size, job_timeout, max_jobs_per_worker, memory_options)
+    started = time.perf_counter()
+    pool.start()
+    print(f"🔥 {pool.workers} render workers warm in {time.perf_counter() - started:.1f}s")
+
+    if socket_path:
+        server = ThreadingUnixHTTPServer(socket_path, RenderRequestHandler)
+        where = socket_path
+    else:
+        server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+        where = f"http://{host}:{port}"
+    server.pool = pool
+
+    print(f"✓ PDF render daemon listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
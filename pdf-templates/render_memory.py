@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Per-render memory budgets and worker drift tracking
+
+WeasyPrint's memory grows with the document, and one oversized content_html
+can push a worker into the OOM killer along with every job it shares the
+machine with. With a budget set (set_memory_budget() in generate_pdf.py,
+--memory-budget-mb on batch/render/serve), every render runs under a
+MemoryGuard:
+
+- a sampler thread reads the process RSS (and, with tracing on, the Python
+  heap from tracemalloc) every 50 ms while the render runs
+- when the render has grown RSS (or the traced heap) by more than its
+  budget, MemoryBudgetExceeded is raised in the rendering thread, once,
+  which unwinds the layout at its next Python instruction, well before the
+  kernel steps in; should the render swallow it and finish anyway, the
+  guard raises it on the way out, with a message saying how far over it went
+- afterwards the garbage is collected and freed heap handed back to the OS,
+  and the RSS that is left is the job's steady-state figure
+
+Every job's figures are kept as a dict (rss_start_kb, rss_peak_kb,
+rss_steady_kb, peak_kb and, with tracing, traced_peak_kb: the heap's growth
+during the job, like peak_kb for RSS) and, per process, compared with the
+steady state after its first job. Once a worker has
+drifted more than its allowance above that baseline, the stats say
+'recycle' and the batch pool and render daemon replace it.
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import traceback as tb
+import tracemalloc
+
+DEFAULT_INTERVAL = 0.05
+
+# Steady-state growth over a worker's baseline before it is recycled
+DEFAULT_MAX_DRIFT = 256 * 1024 * 1024
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+_libc = None
+
+# This process's steady-state RSS after its first guarded job, in KB
+_baseline_kb = None
+_max_drift = DEFAULT_MAX_DRIFT
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """A render grew past its memory budget and was aborted"""
+
+    def __init__(self, message='render exceeded its memory budget', stats=None):
+        MemoryError.__init__(self, message, stats)
+        self.stats = stats
+
+    def __str__(self):
+        return self.args[0]
+
+
+def current_rss():
+    """Resident set size in bytes (the peak so far where /proc isn't available)"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def release_memory():
+    """Collect garbage and hand freed heap pages back to the OS (glibc only)"""
+    global _libc
+    gc.collect()
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library('c'))
+        except OSError:
+            _libc = False
+    if _libc and hasattr(_libc, 'malloc_trim'):
+        _libc.malloc_trim(0)
+
+
+def set_max_drift(max_drift):
+    """Steady-state growth in bytes over this process's baseline before it asks to be recycled"""
+    global _max_drift
+    _max_drift = max_drift
+
+
+def _raise_in(thread_id, exc_type):
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id),
+                                               ctypes.py_object(exc_type) if exc_type else None)
+
+
+def _mb(kb):
+    return f"{kb / 1024:.1f} MB"
+
+
+class MemoryGuard:
+    """
+    Context manager that samples memory during a render and aborts it when
+    it grows past budget (run() wraps a call the same way and also survives
+    the abort arriving while the guard itself is exiting)
+
+    Args:
+        budget: Bytes the block may grow RSS (or the traced heap) by, or
+            None to only measure
+        trace: Also sample the Python heap with tracemalloc (slows
+            allocation-heavy code down noticeably)
+        interval: Seconds between samples
+
+    Raises:
+        MemoryBudgetExceeded: From the with block, carrying the stats
+    """
+
+    def __init__(self, budget=None, trace=False, interval=DEFAULT_INTERVAL):
+        self.budget = budget
+        self.trace = trace
+        self.interval = interval
+        self.stats = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._tripped = None
+        self._disarmed = False
+        self._started_tracing = False
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        if self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            # Heap that was already live (tracing may have been on before) doesn't count
+            self._traced_start = self._traced_peak = tracemalloc.get_traced_memory()[0]
+        self._start = self._peak = current_rss()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name='memory-guard', daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            with self._lock:
+                self._peak = max(self._peak, rss)
+                if self.trace:
+                    self._traced_peak = max(self._traced_peak, tracemalloc.get_traced_memory()[1])
+                if self._stop.is_set() or self.budget is None or self._tripped:
+                    continue
+                if self._peak - self._start > self.budget:
+                    self._tripped = 'RSS'
+                elif self.trace and self._traced_peak - self._traced_start > self.budget:
+                    self._tripped = 'Python heap'
+                if self._tripped:
+                    # Only once: a second raise could land in cleanup code or
+                    # an except clause already unwinding the first
+                    _raise_in(self._thread_id, MemoryBudgetExceeded)
+
+    def _disarm(self):
+        """Stop sampling, dropping a raise that hasn't been delivered yet"""
+        with self._lock:
+            self._stop.set()
+            if self._tripped and not self._disarmed:
+                _raise_in(self._thread_id, None)
+            self._disarmed = True
+        self._sampler.join()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._disarm()
+        except MemoryBudgetExceeded:
+            # Delivered here rather than inside the block; nothing more can be
+            self._disarm()
+        self._close(traceback if exc_type is not None else None)
+        if self._tripped:
+            raise self._exceeded() from None
+        return False
+
+    def run(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) under the guard"""
+        try:
+            with self:
+                return fn(*args, **kwargs)
+        except MemoryBudgetExceeded as e:
+            if self.stats is None:
+                # Landed before __exit__ got going, so finish up here
+                self._disarm()
+                self._close(e.__traceback__)
+                raise self._exceeded() from None
+            raise
+
+    def _close(self, traceback):
+        if self._tripped and traceback is not None:
+            # Let the aborted layout's objects go before measuring the steady state
+            tb.clear_frames(traceback)
+        self._finish()
+
+    def _exceeded(self):
+        over = self.stats['peak_kb'] if self._tripped == 'RSS' else self.stats['traced_peak_kb']
+        return MemoryBudgetExceeded(
+            f"render aborted after {self.stats['seconds']:.1f}s: {self._tripped} grew by {_mb(over)}, "
+            f"over its {_mb(self.budget // 1024)} budget (process peak {_mb(self.stats['rss_peak_kb'])})",
+            self.stats)
+
+    def _finish(self):
+        global _baseline_kb
+        seconds = time.perf_counter() - self._started
+        self._peak = max(self._peak, current_rss())
+        if self.trace:
+            self._traced_peak = max(self._traced_peak, tracemalloc.get_traced_memory()[1])
+            if self._started_tracing:
+                tracemalloc.stop()
+        release_memory()
+        steady_kb = current_rss() // 1024
+        if _baseline_kb is None and not self._tripped:
+            _baseline_kb = steady_kb
+        drift_kb = steady_kb - _baseline_kb if _baseline_kb is not None else 0
+        self.stats = {
+            'rss_start_kb': self._start // 1024,
+            'rss_peak_kb': self._peak // 1024,
+            'rss_steady_kb': steady_kb,
+            'peak_kb': (self._peak - self._start) // 1024,
+            'drift_kb': drift_kb,
+            'recycle': bool(self._tripped) or drift_kb * 1024 > _max_drift,
+            'seconds': round(seconds, 3),
+        }
+        if self.budget is not None:
+            self.stats['budget_kb'] = self.budget // 1024
+        if self.trace:
+            self.stats['traced_peak_kb'] = (self._traced_peak - self._traced_start) // 1024
+
+
+def format_stats(stats):
+    """One-line summary of a job's memory figures"""
+    if not stats:
+        return ''
+    return (f"peak +{_mb(stats['peak_kb'])} ({_mb(stats['rss_peak_kb'])} RSS), "
+            f"steady {_mb(stats['rss_steady_kb'])}"
+            f"{', heap ' + _mb(stats['traced_peak_kb']) if 'traced_peak_kb' in stats else ''}"
+            f"{', drift +' + _mb(stats['drift_kb']) if stats['drift_kb'] >= 1024 else ''}")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Per-phase timing instrumentation for PdfRenderer
+
+When a renderer has a metrics sink, every render is split into phases and
+reported as one JSON-serialisable record:
+
+    {"document": "The 7-Day Reset", "pages": 24, "boxes": 5310,
+     "phases": {"jinja_render": 0.001, "html_parse": 0.012, "css_cascade": 0.094,
+                "box_build": 0.041, "layout": 0.63, "pdf_write": 0.22},
+     "total_seconds": 0.998, "bytes": 183204, "pid": 4242}
+
+The first record from a renderer also carries its one-time "setup" phases
+(template load, engine import, stylesheet parse). A sink is any callable
+taking the record; json_lines_sink() writes them as JSON lines. Without a
+sink PdfRenderer never touches this module, so instrumentation costs nothing.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+# weasyprint.document functions timed as separate phases, in call order
+WEASYPRINT_PHASES = (
+    ('get_all_computed_styles', 'css_cascade'),
+    ('build_formatting_structure', 'box_build'),
+    ('layout_document', 'layout'),
+)
+
+_patch_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def phase(phases, name):
+    """Add the time spent in the block to phases[name]"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+
+@contextlib.contextmanager
+def weasyprint_phases(phases):
+    """
+    Time WeasyPrint's cascade, box building and layout steps separately
+
+    HTML.render() runs all three in one call, so the module-level functions
+    it looks up are wrapped for the duration of the block. If they are not
+    where this expects (a different WeasyPrint version), the whole render is
+    timed as a single "layout" phase instead.
+    """
+    try:
+        import weasyprint.document as wp_document
+    except ImportError:
+        wp_document = None
+
+    targets = [(attr, name) for attr, name in WEASYPRINT_PHASES
+               if wp_document is not None and callable(getattr(wp_document, attr, None))]
+    if len(targets) != len(WEASYPRINT_PHASES):
+        with phase(phases, 'layout'):
+            yield
+        return
+
+    with _patch_lock:
+        originals = {attr: getattr(wp_document, attr) for attr, _ in targets}
+
+        def timed(original, name):
+            def wrapper(*args, **kwargs):
+                with phase(phases, name):
+                    return original(*args, **kwargs)
+            return wrapper
+
+        for attr, name in targets:
+            setattr(wp_document, attr, timed(originals[attr], name))
+        try:
+            yield
+        finally:
+            for attr, original in originals.items():
+                setattr(wp_document, attr, original)
+
+
+def count_boxes(document):
+    """Number of layout boxes across all pages of a WeasyPrint Document"""
+    total = 0
+    for page in document.pages:
+        page_box = getattr(page, '_page_box', None)
+        if page_box is not None and hasattr(page_box, 'descendants'):
+            total += sum(1 for _ in page_box.descendants())
+    return total
+
+
+def build_record(title, phases, document, output_path=None, setup=None):
+    record = {
+        'document': title,
+        'pages': len(document.pages),
+        'boxes': count_boxes(document),
+        'phases': {name: round(seconds, 6) for name, seconds in phases.items()},
+        'total_seconds': round(sum(phases.values()), 6),
+        'pid': os.getpid(),
+    }
+    if isinstance(output_path, (str, os.PathLike)) and os.path.exists(output_path):
+        record['bytes'] = os.path.getsize(output_path)
+    if setup:
+        record['setup'] = {name: round(seconds, 6) for name, seconds in setup.items()}
+    return record
+
+
+def json_lines_sink(target='-'):
+    """
+    Sink that writes each record as one JSON line
+
+    Args:
+        target: File path to append to, or '-' for stderr. Lines are
+            written with a single append each, so several worker processes
+            can share one file.
+    """
+    def sink(record):
+        line = json.dumps(record, sort_keys=True) + '\n'
+        if target == '-':
+            sys.stderr.write(line)
+            return
+        with open(target, 'a', encoding='utf-8') as f:
+            f.write(line)
+    return sink
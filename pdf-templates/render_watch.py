@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Watch mode: rebuild only the PDFs affected by an edit
+
+Keeps a dependency graph from inputs to output PDFs:
+
+    templates/* (layout + CSS)              -> every document
+    fonts/*                                 -> every document
+    products/foo.md, lead_magnets/bar.md    -> that document's PDF
+
+templates/, fonts/ and the source directories are watched with inotify
+(directory watches, so editors that save by rename are seen too; other
+platforms fall back to polling mtimes). Bursts of events are debounced, then
+the affected documents are rebuilt on a pool of worker processes that stay
+warm between rebuilds: a worksheet edit only pays for its own layout, and a
+template change fans out across every worker. A template change recompiles
+the template library (template_library.py) first, and workers reload
+templates and fonts themselves when a shared input changes.
+
+Run with: python3 generate_pdf.py watch [-o out/] [-j 4]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import time
+
+import font_registry
+import generate_pdf
+import template_library
+
+# inotify(7) event bits
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+# Quiet time after the last event before a rebuild starts
+DEBOUNCE_SECONDS = 0.1
+POLL_SECONDS = 0.5
+
+
+class InotifyWatcher:
+    """Directory watches on Linux via libc's inotify calls"""
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.directories[wd] = directory
+
+    def wait(self, timeout=None):
+        """Block for events, then return the set of changed paths (debounced)"""
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            changed.update(self._read())
+            ready, _, _ = select.select([self.fd], [], [], DEBOUNCE_SECONDS)
+        return changed
+
+    def _read(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+            if wd in self.directories and name:
+                yield os.path.join(self.directories[wd], os.fsdecode(name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """mtime scan fallback for platforms without inotify"""
+
+    def __init__(self, directories):
+        self.directories = list(directories)
+        self.seen = self._scan()
+
+    def _scan(self):
+        found = {}
+        for directory in self.directories:
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    found[entry.path] = entry.stat().st_mtime_ns
+        return found
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(POLL_SECONDS)
+            current = self._scan()
+            changed = {path for path in set(current) | set(self.seen)
+                       if current.get(path) != self.seen.get(path)}
+            self.seen = current
+            if changed:
+                return changed
+        return set()
+
+    def close(self):
+        pass
+
+
+def open_watcher(directories):
+    try:
+        return InotifyWatcher(directories)
+    except (OSError, AttributeError, TypeError):
+        return PollingWatcher(directories)
+
+
+class DependencyGraph:
+    """
+    Which output PDFs depend on which input files
+
+    Args:
+        root: Repo root the catalog globs are relative to
+        patterns: Catalog globs (generate_pdf.CATALOG_GLOBS)
+        out_dir: Output directory (None = next to each source)
+    """
+
+    def __init__(self, root=generate_pdf.REPO_ROOT, patterns=generate_pdf.CATALOG_GLOBS, out_dir=None,
+                 template_dir=template_library.TEMPLATE_DIR, font_dir=font_registry.FONT_DIR):
+        self.root = root
+        self.patterns = patterns
+        self.out_dir = out_dir
+        self.template_dir = os.path.abspath(template_dir)
+        self.font_dir = os.path.abspath(font_dir)
+        self.sources = {os.path.abspath(path) for path in generate_pdf.discover_sources(root, patterns)}
+
+    def output_for(self, source_path):
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.out_dir or os.path.dirname(source_path), stem + '.pdf')
+
+    def shared_inputs(self):
+        inputs = [os.path.join(self.template_dir, name) for name in os.listdir(self.template_dir)]
+        if os.path.isdir(self.font_dir):
+            inputs.extend(os.path.join(self.font_dir, name) for name in os.listdir(self.font_dir))
+        return inputs
+
+    def watch_directories(self):
+        directories = {self.template_dir}
+        if os.path.isdir(self.font_dir):
+            directories.add(self.font_dir)
+        directories.update(os.path.join(self.root, os.path.dirname(pattern)) for pattern in self.patterns)
+        return sorted(d for d in directories if os.path.isdir(d))
+
+    def is_source(self, path):
+        relative = os.path.relpath(path, self.root)
+        return any(fnmatch.fnmatch(relative, pattern) for pattern in self.patterns)
+
+    def is_shared(self, path):
+        return os.path.dirname(path) in (self.template_dir, self.font_dir)
+
+    def affected(self, changed_paths):
+        """
+        Returns:
+            (sources to rebuild, whether a shared input changed)
+        """
+        shared = False
+        rebuild = set()
+        for path in map(os.path.abspath, changed_paths):
+            if self.is_shared(path):
+                shared = True
+            elif self.is_source(path):
+                if os.path.exists(path):
+                    self.sources.add(path)
+                    rebuild.add(path)
+                else:
+                    self.sources.discard(path)
+        if shared:
+            rebuild = set(self.sources)
+        return sorted(rebuild, key=lambda path: (-os.path.getsize(path), path)), shared
+
+    def stale(self):
+        """Sources whose PDF is missing or older than any of its inputs"""
+        shared_mtime = max((os.path.getmtime(p) for p in self.shared_inputs() if os.path.exists(p)), default=0)
+        stale = []
+        for source in sorted(self.sources):
+            output = self.output_for(source)
+            if not os.path.exists(output) or os.path.getmtime(output) < max(shared_mtime, os.path.getmtime(source)):
+                stale.append(source)
+        return stale
+
+
+_generation = None
+
+
+def _warm_worker():
+    generate_pdf.get_renderer().render('', '', '<p>warm-up</p>')
+
+
+def _watch_build(source_path, output_path, generation):
+    """build_document() that first reloads template and fonts if they changed"""
+    global _generation
+    if generation != _generation:
+        if _generation is not None:
+            font_registry.reset()
+            generate_pdf.reset_renderers()
+        _generation = generation
+    return generate_pdf.build_document(source_path, output_path)
+
+
+def rebuild(pool, graph, sources, generation):
+    started = time.perf_counter()
+    futures = {source: pool.submit(_watch_build, source, graph.output_for(source), generation)
+               for source in sources}
+    for source, future in futures.items():
+        name = os.path.relpath(source, graph.root)
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"   ✗ {name}: {e}")
+            continue
+        print(f"   ✓ {name:<50} {result['pages']:>4} pages {result['seconds']:>6.2f}s")
+    print(f"   Rebuilt {len(sources)} document(s) in {time.perf_counter() - started:.2f}s")
+
+
+def watch(out_dir=None, jobs=None):
+    """Build stale documents, then rebuild affected ones on every change until Ctrl+C"""
+    graph = DependencyGraph(out_dir=out_dir)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    watcher = open_watcher(graph.watch_directories())
+    generation = 0
+    template_library.ensure_compiled()
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_worker) as pool:
+        stale = graph.stale()
+        if stale:
+            print(f"🔨 {len(stale)} document(s) out of date")
+            rebuild(pool, graph, stale, generation)
+        kind = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+        print(f"👀 Watching {len(graph.sources)} documents, template and fonts ({kind}, {jobs} workers)")
+        try:
+            while True:
+                changed = watcher.wait()
+                sources, shared = graph.affected(changed)
+                if not sources:
+                    continue
+                if shared:
+                    generation += 1
+                    template_library.ensure_compiled()
+                    print("\n🎨 Template or fonts changed")
+                else:
+                    print(f"\n✏️  {', '.join(os.path.relpath(s, graph.root) for s in sources)}")
+                rebuild(pool, graph, sources, generation)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+        finally:
+            watcher.close()
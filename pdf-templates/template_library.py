@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+The REWIRED template library
+
+templates/base.html holds the page layout and the shared stylesheet. Each
+document type extends it and overrides only the blocks it changes (styles,
+adding to {{ super() }}, header, content, footer_note):
+
+    workbook     products and lead magnets, the full REWIRED look (default)
+    worksheet    fill-in worksheets: compact header, room to write
+    handout      one- or two-page handouts: title bar, no support note
+    manuscript   book shards for manuscript_pdf.py
+
+Every worker process used to parse and compile the template on start-up.
+The library is now precompiled to Python modules in .cache/templates/ (by
+`python3 template_library.py`, and before every batch), which workers import
+without touching the Jinja parser. When a template has changed since, the
+library is loaded from source through a bytecode cache in .cache/jinja/
+until it is compiled again.
+
+.cache/templates is a symlink to the build for the current library hash
+(.cache/templates-3f9a1c2b7d4e/), so a rebuild is swapped in with one rename
+and workers never see a half-written or missing library; compiles from
+several processes take turns on a file lock.
+"""
+
+import argparse
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+import jinja2
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, ModuleLoader
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+COMPILED_DIR = os.path.join(BASE_DIR, '.cache', 'templates')
+BYTECODE_DIR = os.path.join(BASE_DIR, '.cache', 'jinja')
+
+DEFAULT_TEMPLATE = 'workbook'
+
+# Written next to the compiled modules: the library_hash() they were built from
+STAMP_NAME = 'library.json'
+
+STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.DOTALL | re.IGNORECASE)
+
+
+def template_names(template_dir=TEMPLATE_DIR):
+    """Document types in the library (every template except base.html)"""
+    return sorted(os.path.splitext(os.path.basename(path))[0]
+                  for path in glob.glob(os.path.join(template_dir, '*.html'))
+                  if os.path.basename(path) != 'base.html')
+
+
+def library_hash(template_dir=TEMPLATE_DIR):
+    """Hash of every template file and the Jinja version, changes whenever one does"""
+    digest = hashlib.sha256(jinja2.__version__.encode('utf-8'))
+    for path in sorted(glob.glob(os.path.join(template_dir, '*.html'))):
+        digest.update(os.path.basename(path).encode('utf-8') + b'\0')
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _environment(loader, **options):
+    # Content arrives as finished HTML, so nothing is escaped
+    return Environment(loader=loader, autoescape=False, **options)
+
+
+def compile_library(target=COMPILED_DIR, template_dir=TEMPLATE_DIR):
+    """
+    Compile every template to an importable Python module and point target
+    (a symlink) at the result
+
+    Returns:
+        The library_hash() the modules were built from
+    """
+    current = library_hash(template_dir)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(f"{target}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        build_dir = f"{target}-{current[:12]}"
+        if not os.path.exists(os.path.join(build_dir, STAMP_NAME)):
+            tmp_dir = f"{build_dir}.{os.getpid()}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            env = _environment(FileSystemLoader(template_dir))
+            env.compile_templates(tmp_dir, zip=None, filter_func=lambda name: name.endswith('.html'))
+            with open(os.path.join(tmp_dir, STAMP_NAME), 'w', encoding='utf-8') as f:
+                json.dump({'library': current, 'templates': template_names(template_dir)}, f)
+            shutil.rmtree(build_dir, ignore_errors=True)
+            os.replace(tmp_dir, build_dir)
+
+        if os.path.isdir(target) and not os.path.islink(target):
+            # A plain directory from before builds were versioned
+            shutil.rmtree(target)
+        link_path = f"{target}.{os.getpid()}.link"
+        if os.path.lexists(link_path):
+            os.remove(link_path)
+        os.symlink(os.path.basename(build_dir), link_path)
+        os.replace(link_path, target)
+
+        for old_dir in glob.glob(f"{glob.escape(target)}-*"):
+            if old_dir != build_dir and not old_dir.endswith('.tmp'):
+                shutil.rmtree(old_dir, ignore_errors=True)
+    return current
+
+
+def is_compiled(target=COMPILED_DIR, template_dir=TEMPLATE_DIR):
+    """Whether target holds modules built from the current templates"""
+    try:
+        with open(os.path.join(target, STAMP_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f).get('library') == library_hash(template_dir)
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def ensure_compiled(target=COMPILED_DIR, template_dir=TEMPLATE_DIR):
+    """Compile the library unless target is already up to date"""
+    if not is_compiled(target, template_dir):
+        # Another process may have finished the same build while this one waited for the lock
+        compile_library(target, template_dir)
+
+
+def get_environment(target=COMPILED_DIR, template_dir=TEMPLATE_DIR):
+    """
+    Jinja environment for the library: the precompiled modules when they are
+    current, otherwise the sources with a persistent bytecode cache
+    """
+    if is_compiled(target, template_dir):
+        return _environment(ModuleLoader(target))
+    os.makedirs(BYTECODE_DIR, exist_ok=True)
+    return _environment(FileSystemLoader(template_dir), bytecode_cache=FileSystemBytecodeCache(BYTECODE_DIR))
+
+
+def load_template(name=DEFAULT_TEMPLATE, environment=None):
+    """
+    Returns:
+        (jinja2 Template, its stylesheet text without @font-face rules)
+    """
+    if name not in template_names():
+        raise ValueError(f"Unknown template {name!r} (choose from {', '.join(template_names())})")
+    template = (environment or get_environment()).get_template(f"{name}.html")
+    page = template.render(title='', subtitle='', content='', inline_css=True, font_face_css='')
+    match = STYLE_BLOCK_RE.search(page)
+    return template, match.group(1) if match else ''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompile the REWIRED template library")
+    parser.add_argument('--check', action='store_true', help="Only report whether the compiled modules are current")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        current = is_compiled()
+        print(f"{'✅' if current else '❌'} Compiled templates {'are current' if current else 'are missing or stale'}")
+        return 0 if current else 1
+
+    started = time.perf_counter()
+    compile_library()
+    print(f"✓ Compiled {', '.join(template_names())} to {os.path.relpath(COMPILED_DIR)} "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
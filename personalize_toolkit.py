@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Personalized copies of the Recovery Toolkit
+
+The full ReportLab build in create_recovery_toolkit_pdf() runs once; the
+base PDF and the positions of its blanks are cached on disk. Each buyer's
+copy is then the base plus a small stamp layer: their name under the title
+and their pre-filled Emergency Contact Card, written as an incremental
+update so the base pages are never re-rendered or re-serialised.
+
+    python3 personalize_toolkit.py buyers.csv -o personalized/
+
+buyers.csv has a header row using any of the FIELDS below, plus an optional
+"id" column used for the output file names.
+"""
+
+import argparse
+import contextlib
+import csv
+import datetime
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from pypdf import PdfReader, PdfWriter
+from reportlab import Version as REPORTLAB_VERSION
+from reportlab.lib.colors import HexColor
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+import generate_recovery_toolkit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(HERE, '.cache', 'recovery-toolkit')
+
+FIELDS = ('name', 'sobriety_date', 'days_sober', 'sponsor', 'sponsor_phone',
+          'therapist', 'therapist_phone', 'partner', 'partner_phone')
+
+STAMP_COLOR = HexColor('#1e3a8a')
+MIN_FONT_SIZE = 6
+
+SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+def base_key():
+    """Changes whenever the toolkit's content or the ReportLab version does"""
+    digest = hashlib.sha256()
+    with open(generate_recovery_toolkit.__file__, 'rb') as f:
+        digest.update(f.read())
+    digest.update(REPORTLAB_VERSION.encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def days_since(date_text, today=None):
+    started = datetime.date.fromisoformat(date_text)
+    return ((today or datetime.date.today()) - started).days
+
+
+class ToolkitPersonalizer:
+    """
+    Renders the toolkit once and stamps per-buyer fields onto copies of it
+
+    Args:
+        cache_dir: Where the base PDF and field layout are kept (None = memory only)
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._base = None
+        self._layout = None
+        self._reader = None
+
+    def load_base(self):
+        """Return (base PDF bytes, field layout), rendering them on first use"""
+        if self._base is not None:
+            return self._base, self._layout
+
+        key = base_key()
+        base_dir = os.path.join(self.cache_dir, key) if self.cache_dir else None
+        pdf_path = os.path.join(base_dir, 'base.pdf') if base_dir else None
+        layout_path = os.path.join(base_dir, 'layout.json') if base_dir else None
+
+        if base_dir and os.path.exists(pdf_path) and os.path.exists(layout_path):
+            with open(pdf_path, 'rb') as f:
+                self._base = f.read()
+            with open(layout_path, 'r', encoding='utf-8') as f:
+                self._layout = json.load(f)
+            return self._base, self._layout
+
+        layout = {}
+        self._base = generate_recovery_toolkit.create_recovery_toolkit_pdf(None, field_layout=layout)
+        self._layout = layout
+
+        if base_dir:
+            os.makedirs(base_dir, exist_ok=True)
+            for path, data in ((pdf_path, self._base), (layout_path, json.dumps(layout, indent=2).encode('utf-8'))):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        return self._base, self._layout
+
+    def field_values(self, fields, today=None):
+        """Stamp text for each field that has a layout position"""
+        values = {name: str(value).strip() for name, value in fields.items()
+                  if name in FIELDS and value not in (None, '')}
+        if 'days_sober' not in values and 'sobriety_date' in values:
+            with contextlib.suppress(ValueError):
+                values['days_sober'] = str(days_since(values['sobriety_date'], today))
+        if 'name' in values:
+            values['name'] = f"Prepared for {values['name']}"
+        return values
+
+    def stamp_layer(self, values):
+        """
+        Draw the field values on a PDF with one page per stamped page
+
+        Returns:
+            (overlay PDF bytes, list of base page indexes in overlay order)
+        """
+        _, layout = self.load_base()
+        by_page = {}
+        for name, text in values.items():
+            if name in layout:
+                by_page.setdefault(layout[name]['page'], []).append((layout[name], text))
+
+        buffer = io.BytesIO()
+        overlay = canvas.Canvas(buffer, pageCompression=0)
+        pages = sorted(by_page)
+        for page in pages:
+            overlay.setFillColor(STAMP_COLOR)
+            for position, text in by_page[page]:
+                size = position['size']
+                # Shrink long values to fit the blank rather than overrun it
+                while size > MIN_FONT_SIZE and pdfmetrics.stringWidth(text, position['font'], size) > position['width']:
+                    size -= 0.5
+                overlay.setFont(position['font'], size)
+                if position['align'] == 'center':
+                    overlay.drawCentredString(position['x'], position['y'], text)
+                else:
+                    overlay.drawString(position['x'], position['y'] + 1, text)
+            overlay.showPage()
+        overlay.save()
+        return buffer.getvalue(), [page - 1 for page in pages]
+
+    def personalize(self, fields, output=None, today=None):
+        """
+        Build one buyer's copy
+
+        Args:
+            fields: Mapping of FIELDS names to values; unknown or empty ones
+                are left blank
+            output: Optional path or writable binary file object
+            today: Date days_sober is counted to (defaults to today)
+
+        Returns:
+            The personalized PDF as bytes
+        """
+        base, _ = self.load_base()
+        overlay_pdf, page_indexes = self.stamp_layer(self.field_values(fields, today))
+
+        # The base is parsed once; each incremental writer only adds the
+        # stamped pages' new content after the untouched base bytes
+        if self._reader is None:
+            self._reader = PdfReader(io.BytesIO(base))
+        writer = PdfWriter(self._reader, incremental=True)
+        for index, overlay_page in zip(page_indexes, PdfReader(io.BytesIO(overlay_pdf)).pages):
+            writer.pages[index].merge_page(overlay_page)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        data = buffer.getvalue()
+
+        if isinstance(output, (str, os.PathLike)):
+            with open(output, 'wb') as f:
+                f.write(data)
+        elif output is not None:
+            output.write(data)
+        return data
+
+
+def read_buyers(path):
+    """Buyer rows from a CSV file or a JSON list of objects"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        return list(csv.DictReader(f))
+
+
+def output_name(index, buyer):
+    label = buyer.get('id') or buyer.get('name') or str(index)
+    return f"recovery-toolkit-{SLUG_RE.sub('-', str(label).lower()).strip('-') or index}.pdf"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stamp personalized copies of the Recovery Toolkit")
+    parser.add_argument('buyers', help="CSV or JSON file with one row per buyer")
+    parser.add_argument('-o', '--out-dir', default='personalized', help="Output folder (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true', help="Re-render the base PDF instead of using the cache")
+    args = parser.parse_args(argv)
+
+    buyers = read_buyers(args.buyers)
+    personalizer = ToolkitPersonalizer(cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR)
+
+    started = time.perf_counter()
+    personalizer.load_base()
+    base_seconds = time.perf_counter() - started
+    print(f"📄 Base toolkit ready in {base_seconds:.2f}s")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    started = time.perf_counter()
+    for index, buyer in enumerate(buyers, start=1):
+        personalizer.personalize(buyer, os.path.join(args.out_dir, output_name(index, buyer)))
+    seconds = time.perf_counter() - started
+
+    per_copy = seconds / len(buyers) * 1000 if buyers else 0
+    print(f"✅ {len(buyers)} personalized copies in {seconds:.2f}s "
+          f"({per_copy:.1f} ms each) -> {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
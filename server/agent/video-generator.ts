@@ -17,6 +17,7 @@
 
 import { ENV } from "../_core/env";
 import { getDb } from "../db";
+import { invalidateCatalog } from "../lessonCatalog";
 
 // ─── Config ─────────────────────────────────────────────────────────────────
 
@@ -203,6 +204,7 @@ export async function pollPendingVideos(): Promise<{
                 SET video_url = ${status.videoUrl}
                 WHERE id = ${job.lesson_id}`
           );
+          invalidateCatalog(job.product_id);
 
           // Mark job as completed
           await db.execute(
@@ -0,0 +1,75 @@
+import fs from "fs";
+import path from "path";
+import type { Lesson } from "../drizzle/schema";
+
+// Full lesson snapshots written by seed-lessons.py (see lesson_catalog.py).
+// They carry the paid media URLs, so they live outside client/public and are
+// only handed out by members.getCourseContent after its access check.
+// Anything here that writes the lessons table calls invalidateCatalog(), so
+// members fall back to the database until the seeder writes a fresh snapshot.
+const CATALOG_DIR = path.join(process.cwd(), "catalog");
+const SCHEMA_VERSION = 1;
+
+type SnapshotLesson = Partial<Omit<Lesson, "productId">> & { id: number; dayNumber: number; title: string };
+
+const loaded = new Map<string, { mtimeMs: number; lessons: Lesson[] | null }>();
+
+/**
+ * A product's lessons from its catalog snapshot, ordered by day, or null when
+ * there is no usable snapshot (missing, unreadable, another schema version or
+ * built without lesson ids) and the lessons table has to be queried instead.
+ * Snapshots are re-read only when the file changes.
+ */
+export function getCatalogLessons(productId: string): Lesson[] | null {
+  if (!/^[\w-]+$/.test(productId)) return null;
+  const file = path.join(CATALOG_DIR, `${productId}.json`);
+
+  let mtimeMs: number;
+  try {
+    mtimeMs = fs.statSync(file).mtimeMs;
+  } catch {
+    return null;
+  }
+  const cached = loaded.get(productId);
+  if (cached && cached.mtimeMs === mtimeMs) return cached.lessons;
+
+  let lessons: Lesson[] | null = null;
+  try {
+    const snapshot = JSON.parse(fs.readFileSync(file, "utf-8"));
+    const entries: SnapshotLesson[] = snapshot.lessons;
+    if (snapshot.schema === SCHEMA_VERSION && snapshot.productId === productId
+        && entries.every(lesson => typeof lesson.id === "number")) {
+      lessons = entries.map(lesson => ({
+        id: lesson.id,
+        productId,
+        dayNumber: lesson.dayNumber,
+        title: lesson.title,
+        description: lesson.description ?? null,
+        videoUrl: lesson.videoUrl ?? null,
+        posterUrl: lesson.posterUrl ?? null,
+        slideshowUrl: lesson.slideshowUrl ?? null,
+        workbookUrl: lesson.workbookUrl ?? null,
+        durationMinutes: lesson.durationMinutes ?? null,
+      }));
+    }
+  } catch (error) {
+    console.warn(`[Catalog] Ignoring unreadable snapshot ${file}:`, error);
+  }
+  loaded.set(productId, { mtimeMs, lessons });
+  return lessons;
+}
+
+/**
+ * Drop a product's snapshot after its lessons change (new ids, media URLs),
+ * so getCatalogLessons() returns null and callers query the lessons table.
+ */
+export function invalidateCatalog(productId: string): void {
+  if (!/^[\w-]+$/.test(productId)) return;
+  loaded.delete(productId);
+  try {
+    fs.unlinkSync(path.join(CATALOG_DIR, `${productId}.json`));
+    console.log(`[Catalog] Dropped the ${productId} snapshot, its lessons changed`);
+  } catch (error: any) {
+    if (error.code !== "ENOENT") console.warn(`[Catalog] Could not drop the ${productId} snapshot:`, error);
+  }
+}
@@ -743,7 +743,9 @@ RESPOND IN THIS EXACT JSON FORMAT (no markdown fences):
         if (!hasAccess && ctx.user.role !== "admin") {
           throw new Error("You don't have access to this course");
         }
-        const lessons = await getLessonsByProductId(input.productId);
+        const { getCatalogLessons } = await import("./lessonCatalog");
+        // The seeder's snapshot saves the lessons query; lesson writes drop it, so fall back when there isn't one
+        const lessons = getCatalogLessons(input.productId) ?? await getLessonsByProductId(input.productId);
         return { lessons };
       }),
 
@@ -2077,6 +2079,9 @@ Recovery is possible. But it requires working with your biology, not against it.
           for (const lesson of lessonData) {
             await db.insert(lessons).values(lesson);
           }
+          // The reseeded lessons have new ids
+          const { invalidateCatalog } = await import("./lessonCatalog");
+          invalidateCatalog("7-day-reset");
 
           return {
             success: true,
@@ -2097,6 +2102,7 @@ Recovery is possible. But it requires working with your biology, not against it.
         const { default: Replicate } = await import("replicate");
         const { lessons } = await import("../drizzle/schema");
         const { eq, and } = await import("drizzle-orm");
+        const { invalidateCatalog } = await import("./lessonCatalog");
 
         const r2AccessKeyId = process.env.CLOUDFLARE_R2_ACCESS_KEY_ID;
         const r2SecretAccessKey = process.env.CLOUDFLARE_R2_SECRET_ACCESS_KEY;
@@ -2216,6 +2222,7 @@ Recovery is possible. But it requires working with your biology, not against it.
                     eq(lessons.dayNumber, day)
                   )
                 );
+              invalidateCatalog("7-day-reset");
 
               console.log(`[Thumbnails] Day ${day} complete: ${publicUrl}`);
             } catch (err: any) {
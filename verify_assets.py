@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Verify the lesson media referenced by seed-lessons.py
+
+Every videoUrl, posterUrl, slideshowUrl and workbookUrl is checked
+concurrently over a bounded pool of keep-alive connections: a HEAD for
+existence, size and ETag, and for videos a couple of small range GETs to
+read the real duration out of the MP4 header. File names with suspicious
+encodings (spaces, "(1)" upload copies, double-encoded "%25") are flagged.
+
+Results are cached by ETag in .cache/assets.json; a re-run sends one
+conditional HEAD per asset and reuses everything else on a 304.
+
+    python3 verify_assets.py
+    python3 verify_assets.py --base-url http://127.0.0.1:8000   # local stand-in for R2
+    python3 verify_assets.py --json report.json
+
+Only the standard library is used (asyncio streams speaking HTTP/1.1).
+"""
+
+from urllib.parse import unquote, urlsplit
+import argparse
+import asyncio
+import json
+import os
+import re
+import ssl
+import struct
+import sys
+import time
+
+from seed_loader import load_manifest, read_source, DEFAULT_MANIFEST
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(HERE, '.cache', 'assets.json')
+
+URL_FIELDS = ('videoUrl', 'posterUrl', 'slideshowUrl', 'workbookUrl')
+
+# Bytes fetched per range GET while looking for the MP4 'moov' box
+PROBE_BYTES = 64 * 1024
+# Give up on 'moov' boxes larger than this
+MAX_MOOV_BYTES = 16 * 1024 * 1024
+MAX_PROBES = 8
+
+COPY_SUFFIX_RE = re.compile(r'\s\(\d+\)\.[^.]+$')
+
+
+class Response:
+    def __init__(self, status, headers, body=b''):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class ConnectionPool:
+    """
+    Bounded pool of keep-alive HTTP/1.1 connections
+
+    Args:
+        limit: Requests in flight at once, across all hosts
+        timeout: Seconds allowed for one request/response exchange
+    """
+
+    def __init__(self, limit=8, timeout=20):
+        self.limit = asyncio.Semaphore(limit)
+        self.timeout = timeout
+        self.idle = {}
+        self.ssl_context = ssl.create_default_context()
+        self.stats = {'requests': 0, 'connections': 0}
+
+    async def request(self, method, url, headers=None, max_body=None):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}",
+                 "User-Agent: memoir-asset-verifier", "Accept-Encoding: identity"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        async with self.limit:
+            for attempt in range(2):
+                reader, writer, reused = await self._connection(key)
+                try:
+                    writer.write(request)
+                    response, reusable = await asyncio.wait_for(
+                        self._read_response(reader, method, max_body), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # A pooled connection the server already closed: retry once on a fresh one
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                self.stats['requests'] += 1
+                if reusable:
+                    self.idle.setdefault(key, []).append((reader, writer))
+                else:
+                    writer.close()
+                return response
+
+    async def _connection(self, key):
+        idle = self.idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self.ssl_context if scheme == 'https' else None),
+            self.timeout)
+        self.stats['connections'] += 1
+        return reader, writer, False
+
+    async def _read_response(self, reader, method, max_body):
+        head = await reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        reusable = headers.get('connection', '').lower() != 'close'
+
+        if method == 'HEAD' or status in (204, 304) or status < 200:
+            return Response(status, headers), reusable
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readuntil(b'\r\n')
+                    break
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+                if max_body and len(body) >= max_body:
+                    return Response(status, headers, bytes(body[:max_body])), False
+            return Response(status, headers, bytes(body)), reusable
+
+        if 'content-length' in headers:
+            length = int(headers['content-length'])
+            if max_body and length > max_body:
+                # Server ignored the Range header; read what we need and drop the connection
+                return Response(status, headers, await reader.readexactly(max_body)), False
+            return Response(status, headers, await reader.readexactly(length)), reusable
+
+        return Response(status, headers, await reader.read(max_body or -1)), False
+
+
+def total_size(response):
+    """Full object size from Content-Range ("bytes 0-99/12345") or Content-Length"""
+    content_range = response.headers.get('content-range', '')
+    if '/' in content_range and not content_range.endswith('*'):
+        return int(content_range.rsplit('/', 1)[1])
+    if response.status == 200 and 'content-length' in response.headers:
+        return int(response.headers['content-length'])
+    return None
+
+
+async def fetch_range(pool, url, start, length):
+    response = await pool.request('GET', url, {'Range': f"bytes={start}-{start + length - 1}"},
+                                  max_body=start + length)
+    if response.status == 206:
+        return response.body
+    if response.status == 200:
+        return response.body[start:start + length]
+    return b''
+
+
+def iter_boxes(data, offset=0, end=None):
+    """Yield (type, box start, header size, box size) for the ISO BMFF boxes in data"""
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield kind.decode('latin-1'), offset, header, size
+        offset += size
+
+
+def mvhd_duration(moov):
+    """Duration in seconds from the 'mvhd' box inside a 'moov' box's payload"""
+    for kind, start, header, size in iter_boxes(moov):
+        if kind != 'mvhd':
+            continue
+        body = moov[start + header:start + size]
+        if body[0] == 1:
+            timescale, duration = struct.unpack('>IQ', body[20:32])
+        else:
+            timescale, duration = struct.unpack('>II', body[12:20])
+        return duration / timescale if timescale else None
+    return None
+
+
+async def video_duration(pool, url, size):
+    """Read an MP4's duration with small range GETs, wherever its 'moov' box sits"""
+    offset = 0
+    for _ in range(MAX_PROBES):
+        if size is not None and offset + 8 > size:
+            return None
+        data = await fetch_range(pool, url, offset, PROBE_BYTES)
+        boxes = list(iter_boxes(data))
+        if not boxes:
+            return None
+        for kind, start, header, box_size in boxes:
+            if kind == 'moov':
+                if box_size > MAX_MOOV_BYTES:
+                    return None
+                if start + box_size > len(data):
+                    data = await fetch_range(pool, url, offset + start, box_size)
+                    start = 0
+                return mvhd_duration(data[start + header:start + box_size])
+        # Jump past the last box whose header we saw (usually a large 'mdat')
+        _, start, _, box_size = boxes[-1]
+        offset += start + box_size
+    return None
+
+
+def name_warnings(url):
+    """Flag file names that are likely to be wrong or fragile"""
+    raw_name = urlsplit(url).path.rsplit('/', 1)[-1]
+    name = unquote(raw_name)
+    warnings = []
+    if '%25' in raw_name or '%' in name:
+        warnings.append('double-encoded')
+    if ' ' in name or ' ' in raw_name:
+        warnings.append('space in file name')
+    if COPY_SUFFIX_RE.search(name):
+        warnings.append('looks like an upload copy "(n)"')
+    if not name.isascii():
+        warnings.append('non-ASCII file name')
+    return warnings
+
+
+async def check_asset(pool, url, cached):
+    """
+    Returns:
+        dict with url, status, size, etag, content_type, duration_seconds,
+        cached and warnings
+    """
+    headers = {'If-None-Match': cached['etag']} if cached and cached.get('etag') else None
+    response = await pool.request('HEAD', url, headers)
+    etag = response.headers.get('etag')
+
+    if cached and (response.status == 304 or (etag and etag == cached.get('etag'))):
+        return dict(cached, cached=True, warnings=name_warnings(url))
+
+    result = {
+        'url': url,
+        'status': response.status,
+        'size': total_size(response),
+        'etag': etag,
+        'content_type': response.headers.get('content-type'),
+        'duration_seconds': None,
+        'cached': False,
+        'warnings': name_warnings(url),
+    }
+    if response.status == 200 and urlsplit(url).path.lower().endswith(('.mp4', '.m4v', '.mov')):
+        duration = await video_duration(pool, url, result['size'])
+        result['duration_seconds'] = round(duration, 2) if duration else None
+    return result
+
+
+def collect_assets(lessons, base_url=None):
+    """[(lesson, field, url)] for every media URL, with R2_BASE optionally swapped out"""
+    assets = []
+    for lesson in lessons:
+        for field in URL_FIELDS:
+            url = lesson.get(field)
+            if not url:
+                continue
+            if base_url:
+                parts = urlsplit(url)
+                url = base_url.rstrip('/') + parts.path + (f"?{parts.query}" if parts.query else '')
+            assets.append((lesson, field, url))
+    return assets
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    cache = {r['url']: {k: v for k, v in r.items() if k not in ('cached', 'warnings')}
+             for r in results if r.get('status') == 200 and r.get('etag')}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+async def verify(assets, cache, connections=8, timeout=20):
+    pool = ConnectionPool(connections, timeout)
+
+    async def one(url):
+        try:
+            return await check_asset(pool, url, cache.get(url))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            return {'url': url, 'status': None, 'error': f"{type(e).__name__}: {e}",
+                    'cached': False, 'warnings': name_warnings(url)}
+
+    urls = list(dict.fromkeys(url for _, _, url in assets))
+    results = await asyncio.gather(*(one(url) for url in urls))
+    for reader_writers in pool.idle.values():
+        for _, writer in reader_writers:
+            writer.close()
+    return dict(zip(urls, results)), pool.stats
+
+
+def print_report(assets, results):
+    problems = 0
+    for lesson, field, url in assets:
+        result = results[url]
+        label = f"Day {lesson.get('dayNumber')} {field}"
+        if result.get('status') != 200:
+            problems += 1
+            reason = result.get('error') or f"HTTP {result.get('status')}"
+            print(f"   ✗ {label:<20} {reason}  {url}")
+            continue
+        details = []
+        if result.get('size') is not None:
+            details.append(f"{result['size'] / 1024 / 1024:.1f} MB")
+        if result.get('duration_seconds'):
+            minutes = result['duration_seconds'] / 60
+            details.append(f"{minutes:.1f} min")
+            if lesson.get('durationMinutes') and abs(minutes - lesson['durationMinutes']) >= 1:
+                details.append(f"durationMinutes says {lesson['durationMinutes']}")
+        if result.get('cached'):
+            details.append('cached')
+        print(f"   ✓ {label:<20} {', '.join(details)}")
+        for warning in result.get('warnings', []):
+            print(f"     ⚠️  {warning}: {unquote(urlsplit(url).path.rsplit('/', 1)[-1])}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify the lesson media URLs in seed-lessons.py")
+    parser.add_argument('--base-url', default=None,
+                        help="Check against this server instead of R2 (e.g. a local stand-in)")
+    parser.add_argument('-c', '--connections', type=int, default=8, help="Concurrent requests (default: %(default)s)")
+    parser.add_argument('--timeout', type=float, default=20, help="Seconds per request (default: %(default)s)")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help="ETag cache file")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore and don't update the ETag cache")
+    parser.add_argument('--json', default=None, metavar='FILE', help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    dataset = next(d for d in load_manifest(DEFAULT_MANIFEST) if d['name'] == 'lessons')
+    assets = collect_assets(read_source(dataset), args.base_url)
+    cache = {} if args.no_cache else load_cache(args.cache)
+
+    print(f"🔎 Checking {len(assets)} lesson assets ({args.connections} connections)")
+    started = time.perf_counter()
+    results, stats = asyncio.run(verify(assets, cache, args.connections, args.timeout))
+    seconds = time.perf_counter() - started
+
+    problems = print_report(assets, results)
+    hits = sum(1 for r in results.values() if r.get('cached'))
+    print(f"\n   {len(results)} unique URLs, {hits} unchanged since last run, "
+          f"{stats['requests']} requests over {stats['connections']} connections in {seconds:.2f}s")
+
+    if not args.no_cache:
+        save_cache(args.cache, list(results.values()))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(list(results.values()), f, indent=2)
+
+    if problems:
+        print(f"\n❌ {problems} asset(s) missing or unreachable")
+        return 1
+    print("\n✅ All lesson assets are reachable")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())